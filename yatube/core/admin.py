@@ -0,0 +1,43 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+from .tasks import queue_stats
+
+
+class TaskAdmin(admin.ModelAdmin):
+    """Очередь задач: над списком — глубина очереди и задержка."""
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'waiting', 'created',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'name', 'payload', 'dedupe_key', 'status', 'attempts',
+        'max_attempts', 'run_at', 'locked_until', 'created', 'last_error',
+    )
+    actions = ('retry_now',)
+
+    def waiting(self, obj):
+        """Сколько готовая задача ждет воркера."""
+        lag = (timezone.now() - obj.run_at).total_seconds()
+        if obj.status != Task.QUEUED or lag < 0:
+            return '-'
+        return f'{lag:.0f} с'
+    waiting.short_description = 'Ждет'
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'queue_stats': queue_stats()}
+        return super().changelist_view(request, extra_context)
+
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.QUEUED, attempts=0, run_at=timezone.now(),
+        )
+        self.message_user(request, f'Задач поставлено в очередь: {count}')
+    retry_now.short_description = 'Выполнить заново'
+
+
+admin.site.register(Task, TaskAdmin)
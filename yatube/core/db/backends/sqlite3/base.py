@@ -0,0 +1,35 @@
+"""
+SQLite с настройками для боевого режима на одном сервере.
+
+Каждое новое соединение включает WAL (читатели не ждут писателя),
+synchronous=NORMAL, mmap и кэш страниц, а также ждет занятую базу
+busy_timeout миллисекунд вместо немедленной ошибки "database is locked".
+Значения можно переопределить ключом PRAGMAS в настройках базы.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение задает размер в килобайтах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        """
+        Транзакция сразу берет блокировку на запись. При обычном BEGIN
+        читающая транзакция, которая потом пишет, получает
+        "database is locked" без ожидания busy_timeout.
+        """
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,50 @@
+"""
+Маршрутизация чтения на реплики БД.
+
+По умолчанию все запросы идут в основную базу 'default'.
+ReplicaRoutingMiddleware включает чтение с реплик на время обработки
+представлений только для чтения; любая запись в этом же запросе
+возвращает чтение на основную базу.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Сессии всегда читаются с основной базы: после входа или выхода
+# реплика может отдать устаревшую сессию.
+PRIMARY_ONLY_APPS = ('sessions',)
+
+_state = threading.local()
+
+
+def replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def use_replicas(enabled):
+    _state.use_replicas = enabled
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            not getattr(_state, 'use_replicas', False)
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or not replicas()
+        ):
+            return PRIMARY
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            _state.use_replicas = False
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
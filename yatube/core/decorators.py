@@ -0,0 +1,52 @@
+import functools
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов к БД, чем ему разрешено."""
+
+
+class QueryCounter:
+    """Обертка для connection.execute_wrapper, считающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(max_queries):
+    """
+    Ограничивает число запросов к БД за один вызов представления.
+    При превышении пишет предупреждение в лог, а при
+    settings.QUERY_BUDGET_RAISE выбрасывает QueryBudgetExceeded,
+    чтобы регрессия (например, N+1 в шаблоне) падала в тестах.
+    Считаются запросы ко всем базам, включая реплики.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = view_func(request, *args, **kwargs)
+            if counter.count > max_queries:
+                message = (
+                    f'{view_func.__module__}.{view_func.__name__}: '
+                    f'{counter.count} queries, budget is {max_queries}'
+                )
+                if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,197 @@
+import io
+import json
+import platform
+import time
+import tracemalloc
+from importlib import import_module
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from core.decorators import QueryCounter
+from posts.models import Post
+
+User = get_user_model()
+
+URL_MODULES = ('posts.urls', 'users.urls', 'about.urls')
+# GET на эти URL меняет состояние: logout завершил бы сессию --user,
+# и остальные URL замерялись бы анонимно.
+SKIPPED_URLS = ('users:logout',)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет GET-запросы ко всем URL posts, users и about через '
+        'WSGI-приложение yatube.wsgi и сохраняет p50/p95/p99 задержки, '
+        'число SQL-запросов и выделенную память по каждому представлению.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Число замеряемых запросов на каждый URL.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Число запросов на прогрев перед замером.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Имя пользователя, от которого идут запросы.',
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона для сравнения p95.',
+        )
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG включен: Django хранит все SQL-запросы, '
+                'замеры будут завышены.'
+            )
+        self.application = application
+        self.cookie = self.session_cookie(options['user'])
+
+        results = {}
+        for name, path in self.collect_urls():
+            for _ in range(options['warmup']):
+                self.request(path)
+            results[name] = self.measure(path, options['requests'])
+            self.stdout.write(
+                f'{name:<24} {path:<32} '
+                f'p50={results[name]["p50_ms"]:.2f}ms '
+                f'p95={results[name]["p95_ms"]:.2f}ms '
+                f'queries={results[name]["queries"]}'
+            )
+
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'requests': options['requests'],
+                'user': options['user'],
+                'posts': Post.objects.count(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def session_cookie(self, username):
+        if username is None:
+            return ''
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'Пользователь {username} не найден.')
+        client = Client()
+        client.force_login(user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+        return f'{settings.SESSION_COOKIE_NAME}={cookie.value}'
+
+    def collect_urls(self):
+        """Пары (имя URL, путь) с подставленными существующими объектами."""
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False
+        ).first() or Post.objects.select_related('author').first()
+        samples = {}
+        if post is not None:
+            samples['post_id'] = post.pk
+            samples['username'] = post.author.username
+            if post.group is not None:
+                samples['slug'] = post.group.slug
+        urls = []
+        for module_name in URL_MODULES:
+            module = import_module(module_name)
+            for pattern in module.urlpatterns:
+                name = f'{module.app_name}:{pattern.name}'
+                if name in SKIPPED_URLS:
+                    self.stderr.write(f'{name}: меняет состояние, пропуск')
+                    continue
+                converters = pattern.pattern.converters
+                if any(key not in samples for key in converters):
+                    self.stderr.write(f'{name}: нет данных для URL, пропуск')
+                    continue
+                kwargs = {key: samples[key] for key in converters}
+                urls.append((name, reverse(name, kwargs=kwargs)))
+        return urls
+
+    def request(self, path):
+        environ = {
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+            'HTTP_COOKIE': self.cookie,
+            'wsgi.input': io.BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(response_status, headers, exc_info=None):
+            status.append(int(response_status.split()[0]))
+
+        response = self.application(environ, start_response)
+        size = sum(len(chunk) for chunk in response)
+        if hasattr(response, 'close'):
+            response.close()
+        return status[0], size
+
+    def measure(self, path, count):
+        timings = []
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            for _ in range(count):
+                started = time.perf_counter()
+                status, size = self.request(path)
+                timings.append((time.perf_counter() - started) * 1000)
+        # Память меряем отдельным запросом: tracemalloc замедляет код.
+        tracemalloc.start()
+        self.request(path)
+        allocated, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'path': path,
+            'status': status,
+            'bytes': size,
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'mean_ms': sum(timings) / len(timings),
+            'queries': counter.count / count,
+            'peak_alloc_kb': peak / 1024,
+        }
+
+    def compare(self, baseline_path, results):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]['p95_ms']
+            change = (result['p95_ms'] - before) / before * 100
+            self.stdout.write(
+                f'{name:<24} p95 {before:.2f} -> {result["p95_ms"]:.2f}ms '
+                f'({change:+.1f}%)'
+            )
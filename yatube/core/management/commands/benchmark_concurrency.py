@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import Client
+from django.urls import reverse
+
+from core.management.commands.benchmark import percentile
+from posts.models import Post
+
+User = get_user_model()
+
+# Метка текста постов, созданных замером; по ней они удаляются в конце.
+POST_MARKER = 'benchmark_concurrency'
+
+
+class Worker(threading.Thread):
+    """Поток, который шлет запросы, пока не выставлен stop."""
+
+    def __init__(self, stop, send):
+        super().__init__(daemon=True)
+        self.stop = stop
+        self.send = send
+        self.timings = []
+        self.locked = 0
+        self.failed = 0
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                try:
+                    status = self.send()
+                except OperationalError:
+                    self.locked += 1
+                    continue
+                if status >= 400:
+                    self.failed += 1
+                    continue
+                self.timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает сайт параллельно читателями (главная страница) и '
+        'писателями (создание поста) и сохраняет пропускную способность, '
+        'задержки и число ошибок "database is locked". Запустите с '
+        'YATUBE_SQLITE_PROFILE=production и без него, чтобы сравнить '
+        'режимы. Созданные посты удаляются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность замера в секундах.',
+        )
+        parser.add_argument(
+            '--user', help='Автор постов; по умолчанию первый пользователь.',
+        )
+        parser.add_argument(
+            '--output', default='benchmark_concurrency.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона для сравнения пропускной способности.',
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG включен: Django хранит все SQL-запросы, '
+                'замеры будут завышены.'
+            )
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        author = users.first()
+        if author is None:
+            raise CommandError('Нет пользователя для создания постов.')
+
+        stop = threading.Event()
+        readers = [
+            Worker(stop, self.reader()) for _ in range(options['readers'])
+        ]
+        writers = [
+            Worker(stop, self.writer(author))
+            for _ in range(options['writers'])
+        ]
+        started = time.perf_counter()
+        for worker in readers + writers:
+            worker.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for worker in readers + writers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        Post.objects.filter(text__startswith=POST_MARKER).delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        database = connection.settings_dict
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'engine': database['ENGINE'],
+                'conn_max_age': database['CONN_MAX_AGE'],
+                'journal_mode': journal_mode,
+                'readers': options['readers'],
+                'writers': options['writers'],
+                'duration_s': elapsed,
+            },
+            'results': {
+                'reads': self.summary(readers, elapsed),
+                'writes': self.summary(writers, elapsed),
+            },
+        }
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f'{name:<8} {result["per_second"]:.1f}/с '
+                f'p50={result["p50_ms"]:.2f}ms '
+                f'p95={result["p95_ms"]:.2f}ms '
+                f'locked={result["locked"]} failed={result["failed"]}'
+            )
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+        if options['compare']:
+            self.compare(options['compare'], report['results'])
+
+    def reader(self):
+        client = Client()
+        path = reverse('posts:index')
+
+        def send():
+            return client.get(path).status_code
+        return send
+
+    def writer(self, author):
+        client = Client()
+        client.force_login(author)
+        path = reverse('posts:post_create')
+        sent = iter(range(10 ** 9))
+
+        def send():
+            text = f'{POST_MARKER} {next(sent)}'
+            return client.post(path, {'text': text}).status_code
+        return send
+
+    def summary(self, workers, elapsed):
+        timings = [timing for worker in workers for timing in worker.timings]
+        return {
+            'count': len(timings),
+            'per_second': len(timings) / elapsed,
+            'p50_ms': percentile(timings, 50) if timings else 0.0,
+            'p95_ms': percentile(timings, 95) if timings else 0.0,
+            'locked': sum(worker.locked for worker in workers),
+            'failed': sum(worker.failed for worker in workers),
+        }
+
+    def compare(self, baseline_path, results):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        for name, result in results.items():
+            before = baseline[name]['per_second']
+            change = (result['per_second'] - before) / before * 100
+            self.stdout.write(
+                f'{name:<8} {before:.1f} -> {result["per_second"]:.1f}/с '
+                f'({change:+.1f}%)'
+            )
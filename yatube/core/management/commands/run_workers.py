@@ -0,0 +1,95 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import work
+
+
+def run_thread(stop, poll_interval, burst):
+    try:
+        work(stop, poll_interval, burst)
+    finally:
+        connections.close_all()
+
+
+def run_process(stop, poll_interval, burst):
+    # Ctrl+C и SIGTERM получает родитель и останавливает всех через stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    run_thread(stop, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает воркеры фоновой очереди задач (core.tasks). '
+        'Останавливается по Ctrl+C или SIGTERM, дав воркерам '
+        'доделать текущие задачи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Число воркеров.',
+        )
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='Воркеры-потоки или отдельные процессы.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза перед новой проверкой пустой очереди, сек.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда в очереди не останется готовых задач.',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        arguments = (options['poll_interval'], options['burst'])
+        if options['pool'] == 'process':
+            stop = multiprocessing.Event()
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            workers = [
+                multiprocessing.Process(
+                    target=run_process, args=(stop, *arguments)
+                ) for _ in range(concurrency)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(target=run_thread, args=(stop, *arguments))
+                for _ in range(concurrency)
+            ]
+        handlers = self.listen(stop)
+        try:
+            if options['pool'] == 'thread' and concurrency == 1:
+                # Один воркер работает в текущем потоке.
+                done = work(stop, *arguments)
+                self.stdout.write(f'Выполнено задач: {done}')
+                return
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.stdout.write('Воркеры остановлены')
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def listen(self, stop):
+        """Останавливает воркеры по сигналу; возвращает прежние обработчики."""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        def handle_signal(signum, frame):
+            stop.set()
+
+        return {
+            signum: signal.signal(signum, handle_signal)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
@@ -0,0 +1,199 @@
+"""
+Метрики запросов в формате Prometheus без внешних сервисов.
+
+Каждый процесс копит счетчики и гистограммы в памяти и не реже раза
+в METRICS_FLUSH_INTERVAL секунд сбрасывает их в свой файл
+<METRICS_DIR>/metrics-<pid>-<случайный суффикс>.json (запись во временный
+файл и rename); суффикс не дает новому процессу с тем же pid затереть
+файл завершившегося.
+/metrics суммирует файлы всех процессов, поэтому счетчики верны при
+нескольких WSGI-воркерах. Файлы завершившихся воркеров не удаляются:
+иначе счетчики уменьшались бы при перезапуске воркера.
+Без METRICS_DIR метрики видны только в текущем процессе.
+
+Функции из METRICS_GAUGES (пути импорта) вызываются при каждом запросе
+/metrics и возвращают список (имя, описание, значение): так видны
+значения, которые есть только внутри веб-процесса, например счетчики
+локального кэша.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Имя, описание и границы корзин каждой гистограммы.
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время обработки запроса, секунды.', DURATION_BUCKETS,
+    ),
+    'yatube_request_db_queries': (
+        'Число SQL-запросов на запрос.', QUERY_BUCKETS,
+    ),
+    'yatube_response_size_bytes': (
+        'Размер тела ответа, байты.', SIZE_BUCKETS,
+    ),
+}
+REQUESTS_TOTAL = 'yatube_requests_total'
+
+
+def new_histogram(name):
+    return {'buckets': [0] * len(HISTOGRAMS[name][1]), 'sum': 0, 'count': 0}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.file_id = f'{self.pid}-{uuid.uuid4().hex[:8]}'
+        self.requests = defaultdict(int)
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.flushed = time.monotonic()
+
+    def observe(self, view, method, status, duration, queries, size=None):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Процесс форкнут после импорта: чужие данные не наследуем.
+                self.reset()
+            self.requests[f'{view}|{method}|{status}'] += 1
+            self._observe('yatube_request_duration_seconds', view, duration)
+            self._observe('yatube_request_db_queries', view, queries)
+            if size is not None:
+                self._observe('yatube_response_size_bytes', view, size)
+            interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1)
+            if time.monotonic() - self.flushed >= interval:
+                self._flush()
+
+    def _observe(self, name, view, value):
+        histogram = self.histograms[name].get(view)
+        if histogram is None:
+            histogram = self.histograms[name][view] = new_histogram(name)
+        for index, bound in enumerate(HISTOGRAMS[name][1]):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+                break
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+    def data(self):
+        return {'requests': self.requests, 'histograms': self.histograms}
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.flushed = time.monotonic()
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory or self.pid != os.getpid():
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{self.file_id}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as output:
+            json.dump(self.data(), output)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Метрики всех процессов, сложенные вместе."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            with self.lock:
+                return json.loads(json.dumps(self.data()))
+        self.flush()
+        total = {
+            'requests': defaultdict(int),
+            'histograms': {name: {} for name in HISTOGRAMS},
+        }
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            try:
+                with open(path) as source:
+                    data = json.load(source)
+            except (OSError, ValueError):
+                continue
+            for key, value in data['requests'].items():
+                total['requests'][key] += value
+            for name, views in data['histograms'].items():
+                for view, histogram in views.items():
+                    merged = total['histograms'][name].setdefault(
+                        view, new_histogram(name)
+                    )
+                    merged['buckets'] = [
+                        a + b for a, b in
+                        zip(merged['buckets'], histogram['buckets'])
+                    ]
+                    merged['sum'] += histogram['sum']
+                    merged['count'] += histogram['count']
+        return total
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def label(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def collect_gauges():
+    """Значения всех METRICS_GAUGES текущего процесса."""
+    gauges = []
+    for path in getattr(settings, 'METRICS_GAUGES', ()):
+        gauges += import_string(path)()
+    return gauges
+
+
+def render(data, gauges=()):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = [
+        f'# HELP {REQUESTS_TOTAL} Число обработанных запросов.',
+        f'# TYPE {REQUESTS_TOTAL} counter',
+    ]
+    for key, value in sorted(data['requests'].items()):
+        view, method, status = key.split('|')
+        lines.append(
+            f'{REQUESTS_TOTAL}{{view="{label(view)}",method="{method}",'
+            f'status="{status}"}} {value}'
+        )
+    for name, (description, bounds) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for view, histogram in sorted(data['histograms'][name].items()):
+            view = label(view)
+            cumulative = 0
+            for bound, count in zip(bounds, histogram['buckets']):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines += [
+                f'{name}_bucket{{view="{view}",le="+Inf"}} '
+                f'{histogram["count"]}',
+                f'{name}_sum{{view="{view}"}} {histogram["sum"]}',
+                f'{name}_count{{view="{view}"}} {histogram["count"]}',
+            ]
+    for name, description, value in gauges:
+        lines += [
+            f'# HELP {name} {description}',
+            f'# TYPE {name} gauge',
+            f'{name} {value}',
+        ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,49 @@
+import cProfile
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core.profiling import SqlRecorder, save_profile
+
+PROFILE_PARAMETER = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует запрос staff-пользователя с параметром ?_profile=1
+    или заголовком X-Profile: 1: cProfile и все SQL-запросы сохраняются
+    в PROFILE_DIR, id профиля возвращается в заголовке X-Profile-Id.
+    Профиль охватывает middleware после этой и само представление.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.requested(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        recorder = SqlRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - started
+        response['X-Profile-Id'] = save_profile(
+            request, response, profiler, recorder.queries, total
+        )
+        return response
+
+    def requested(self, request):
+        # Пользователь проверяется последним: без флага сессия не читается.
+        return bool(
+            request.GET.get(PROFILE_PARAMETER)
+            or request.META.get(PROFILE_HEADER)
+        ) and request.user.is_staff
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+
+from core.db import routers
+
+STICKY_COOKIE = 'primary_until'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Направляет чтение представлений из settings.REPLICA_VIEWS на реплики.
+    После запроса на запись (POST и т.п.) клиент получает cookie,
+    и следующие REPLICA_STICKY_SECONDS секунд его запросы читают
+    с основной базы, чтобы он сразу видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.use_replicas(False)
+        try:
+            response = self.get_response(request)
+            if request.method not in ('GET', 'HEAD'):
+                sticky_seconds = settings.REPLICA_STICKY_SECONDS
+                response.set_cookie(
+                    STICKY_COOKIE,
+                    str(int(time.time() + sticky_seconds)),
+                    max_age=sticky_seconds,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            routers.use_replicas(False)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routers.use_replicas(
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and not self.is_sticky(request)
+        )
+
+    def is_sticky(self, request):
+        try:
+            return int(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
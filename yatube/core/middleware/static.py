@@ -0,0 +1,126 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Кодировки в порядке предпочтения и расширения их файлов.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Файлы без хэша в имени (в том числе /favicon.ico) могут меняться.
+DEFAULT_MAX_AGE = 60 * 60
+
+ROOT_FILES = {
+    '/favicon.ico': 'img/fav/favicon.ico',
+}
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещенных q=0."""
+    encodings = set()
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if any(param.replace(' ', '') in ('q=0', 'q=0.0') for param in params):
+            continue
+        encodings.add(name.lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """
+    Отдает собранную статику из STATIC_ROOT без обращения к представлениям.
+
+    Файлы с хэшем в имени из манифеста кэшируются браузером на год
+    (immutable), остальные — на час. Если клиент принимает br или gzip
+    и collectstatic подготовил такой вариант, отдается он.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        self.immutable = None
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            name = self.static_name(request.path_info)
+            if name is not None:
+                response = self.serve(request, name)
+                if response is not None:
+                    return response
+        return self.get_response(request)
+
+    def static_name(self, path):
+        if path in ROOT_FILES:
+            return ROOT_FILES[path]
+        if self.prefix.startswith('/') and path.startswith(self.prefix):
+            return path[len(self.prefix):]
+        return None
+
+    def is_immutable(self, name):
+        if self.immutable is None:
+            names = getattr(staticfiles_storage, 'immutable_names', None)
+            self.immutable = names() if names else set()
+        return name in self.immutable
+
+    def find(self, name):
+        """Путь к файлу в STATIC_ROOT, а при DEBUG — и в исходниках."""
+        if not self.root:
+            return finders.find(name) if settings.DEBUG else None
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if os.path.isfile(path):
+            return path
+        if settings.DEBUG:
+            return finders.find(name)
+        return None
+
+    def serve(self, request, name):
+        path = self.find(name)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size,
+        ):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(name)
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = None
+        served_path = path
+        has_variants = False
+        for candidate, extension in ENCODINGS:
+            if os.path.isfile(path + extension):
+                has_variants = True
+                if encoding is None and candidate in accepted:
+                    encoding = candidate
+                    served_path = path + extension
+
+        response = FileResponse(
+            open(served_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if has_variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if request.path_info not in ROOT_FILES and self.is_immutable(name):
+            response['Cache-Control'] = (
+                f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+            )
+        else:
+            response['Cache-Control'] = f'public, max-age={DEFAULT_MAX_AGE}'
+        return response
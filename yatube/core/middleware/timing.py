@@ -0,0 +1,89 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import timing
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Замеряет запрос и отдает результат в заголовке Server-Timing
+    и строкой лога с именем представления (уровень INFO), а для
+    представлений из METRICS_NAMESPACES — в метрики /metrics.
+
+    Стоит первым в MIDDLEWARE, чтобы total и db учитывали остальные
+    middleware (сессии, пользователь). Время view считается от вызова
+    представления до возврата ответа в эту middleware. У потоковых
+    ответов тело отдается позже и в замер не попадает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        server_timing = getattr(settings, 'SERVER_TIMING', True)
+        metrics = getattr(settings, 'METRICS', True)
+        if not (server_timing or metrics):
+            return self.get_response(request)
+        timings = timing.start()
+        request._view_started = None
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+            if request._view_started is not None:
+                timings.view = time.perf_counter() - request._view_started
+            if server_timing:
+                self.report(request, response, timings)
+            if metrics:
+                self.observe(request, response, timings)
+        finally:
+            timing.stop()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def report(self, request, response, timings):
+        total = timings.total
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f'tpl;dur={timings.template * 1000:.1f}',
+            f'view;dur={timings.view * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        match = request.resolver_match
+        fields = {
+            'view': match.view_name if match else '-',
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'view_ms': round(timings.view * 1000, 1),
+            'db_ms': round(timings.db * 1000, 1),
+            'db_queries': timings.queries,
+            'template_ms': round(timings.template * 1000, 1),
+        }
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'timing': fields},
+        )
+
+    def observe(self, request, response, timings):
+        match = request.resolver_match
+        if match is None or match.namespace not in settings.METRICS_NAMESPACES:
+            return
+        registry.observe(
+            match.view_name,
+            request.method,
+            response.status_code,
+            timings.total,
+            timings.queries,
+            None if response.streaming else len(response.content),
+        )
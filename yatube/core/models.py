@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """
+    Задача фоновой очереди (core.tasks).
+    Выполненные задачи удаляются, в таблице остаются ожидающие,
+    выполняемые и окончательно упавшие.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (FAILED, 'ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы', default='{}')
+    # Совпадает у одинаковых задач; снимается, когда задачу взял воркер.
+    dedupe_key = models.CharField(
+        max_length=40, unique=True, blank=True, null=True,
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUS_CHOICES, default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Лимит попыток', default=5)
+    run_at = models.DateTimeField('Выполнить после')
+    # Воркер, упавший посреди задачи, ее не вернет: по истечении
+    # locked_until задачу берет другой воркер.
+    locked_until = models.DateTimeField(blank=True, null=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,111 @@
+"""
+Сохраненные профили отдельных запросов.
+
+Профиль — пара файлов в PROFILE_DIR: <id>.prof (дамп cProfile,
+открывается pstats или snakeviz) и <id>.json (запрос, время и SQL).
+Хранятся последние PROFILE_KEEP профилей, старые удаляются.
+"""
+import glob
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+
+from django.conf import settings
+
+PROFILE_KEEP = 200
+PROFILE_LIST_SIZE = 50
+
+
+class SqlRecorder:
+    """Обертка для connection.execute_wrapper, записывающая SQL и время."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params),
+                'many': many,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(settings.PROFILE_DIR, f'{profile_id}.{extension}')
+
+
+def save_profile(request, response, profiler, queries, total):
+    """Сохраняет профиль запроса и возвращает его id."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    profiler.dump_stats(profile_path(profile_id, 'prof'))
+    match = request.resolver_match
+    meta = {
+        'id': profile_id,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'path': request.get_full_path(),
+        'method': request.method,
+        'view': match.view_name if match else '-',
+        'status': response.status_code,
+        'user': request.user.get_username(),
+        'total_ms': total * 1000,
+        'sql_ms': sum(query['duration_ms'] for query in queries),
+        'queries': queries,
+    }
+    with open(profile_path(profile_id, 'json'), 'w') as output:
+        json.dump(meta, output, ensure_ascii=False)
+    remove_old_profiles()
+    return profile_id
+
+
+def recent_profile_paths(limit):
+    paths = glob.glob(os.path.join(settings.PROFILE_DIR, '*.json'))
+    return sorted(paths, key=os.path.getmtime, reverse=True)[:limit]
+
+
+def remove_old_profiles():
+    for path in recent_profile_paths(None)[PROFILE_KEEP:]:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(f'{path[:-len("json")]}{extension}')
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Последние профили без SQL, самые долгие первыми."""
+    profiles = []
+    for path in recent_profile_paths(PROFILE_LIST_SIZE):
+        try:
+            with open(path) as source:
+                meta = json.load(source)
+        except (OSError, ValueError):
+            continue
+        meta['query_count'] = len(meta.pop('queries'))
+        profiles.append(meta)
+    return sorted(profiles, key=lambda meta: meta['total_ms'], reverse=True)
+
+
+def load_profile(profile_id, top=40):
+    """
+    Описание профиля и текст pstats с самыми дорогими функциями
+    или None, если профиля нет.
+    """
+    try:
+        with open(profile_path(profile_id, 'json')) as source:
+            meta = json.load(source)
+    except FileNotFoundError:
+        return None
+    stream = io.StringIO()
+    stats = pstats.Stats(profile_path(profile_id, 'prof'), stream=stream)
+    stats.sort_stats('cumulative').print_stats(top)
+    meta['stats'] = stream.getvalue()
+    return meta
@@ -0,0 +1,64 @@
+"""
+Хранилище статики для боевого режима.
+
+collectstatic дает файлам имена с хэшем содержимого
+(ManifestStaticFilesStorage) и заранее сжимает текстовые файлы в .gz и,
+если установлен пакет Brotli, в .br. StaticFilesMiddleware отдает
+готовый вариант по Accept-Encoding, так что на запрос ничего не сжимается.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml', '.map',
+)
+# Вариант сохраняется, только если он меньше исходника хотя бы на 5%.
+MIN_COMPRESSION_RATIO = 0.95
+
+
+def compressed_variants(data):
+    yield '.gz', gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(data)
+
+
+def compress_file(path):
+    """Пишет рядом с файлом его сжатые варианты."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    for extension, compressed in compressed_variants(data):
+        target = path + extension
+        if len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+            with open(target, 'wb') as output:
+                output.write(compressed)
+        elif os.path.exists(target):
+            os.remove(target)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # До первого collectstatic манифеста нет: отдаем исходные имена,
+        # чтобы разработка и тесты работали без сборки статики.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in names:
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(name))
+
+    def immutable_names(self):
+        """Имена с хэшем: их содержимое никогда не меняется."""
+        return set(self.hashed_files.values())
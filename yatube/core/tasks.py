@@ -0,0 +1,176 @@
+"""
+Фоновая очередь задач в базе данных, без внешнего брокера.
+
+Функция, помеченная @task, ставится в очередь вызовом func.delay(...):
+в таблицу core_task пишется строка в текущей транзакции, поэтому
+задача появится у воркеров только вместе с записью, которая ее
+породила. Воркеры запускает команда run_workers.
+
+Одинаковые ожидающие задачи (та же функция и аргументы) не дублируются.
+Упавшая задача повторяется с экспоненциальной задержкой, после
+max_attempts попыток остается в таблице со статусом failed.
+При TASKS_EAGER задачи выполняются сразу при постановке (для тестов).
+"""
+import datetime
+import functools
+import hashlib
+import json
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# Задержка перед повтором: TASK_RETRY_DELAY * 2 ** (попытка - 1),
+# но не больше TASK_RETRY_MAX_DELAY, сек.
+TASK_RETRY_DELAY = getattr(settings, 'TASK_RETRY_DELAY', 10)
+TASK_RETRY_MAX_DELAY = getattr(settings, 'TASK_RETRY_MAX_DELAY', 60 * 60)
+# Сколько задача может выполняться, прежде чем ее возьмет другой воркер.
+TASK_LEASE = getattr(settings, 'TASK_LEASE', 10 * 60)
+CLAIM_CANDIDATES = 10
+
+
+def task(func=None, *, max_attempts=MAX_ATTEMPTS):
+    """Помечает функцию задачей и добавляет ей метод delay."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.delay = functools.partial(enqueue, func)
+        return func
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def dedupe_key(name, args, kwargs):
+    raw = json.dumps([name, args, kwargs], sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Ставит func(*args, **kwargs) в очередь.
+    Аргументы должны сериализоваться в JSON.
+    """
+    if getattr(settings, 'TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    args = list(args)
+    # ignore_conflicts: такая задача уже ждет в очереди.
+    Task.objects.bulk_create([Task(
+        name=func.task_name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        dedupe_key=dedupe_key(func.task_name, args, kwargs),
+        max_attempts=func.max_attempts,
+        run_at=timezone.now(),
+    )], ignore_conflicts=True)
+
+
+def retry_delay(attempt):
+    return min(TASK_RETRY_DELAY * 2 ** (attempt - 1), TASK_RETRY_MAX_DELAY)
+
+
+def claimable(now):
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lt=now
+    )
+
+
+def claim_task():
+    """
+    Берет готовую задачу или возвращает None.
+    Задачу забирает условный UPDATE: из нескольких воркеров строку
+    обновит только один, остальные перейдут к следующему кандидату.
+    """
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(claimable(now)).order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:CLAIM_CANDIDATES]
+    )
+    for pk in candidates:
+        claimed = Task.objects.filter(claimable(now), pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=now + datetime.timedelta(seconds=TASK_LEASE),
+            attempts=F('attempts') + 1,
+            # Пока задача выполняется, такую же можно поставить снова.
+            dedupe_key=None,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run_task(task_row):
+    """Выполняет взятую задачу; возвращает True при успехе."""
+    try:
+        func = import_string(task_row.name)
+        if not hasattr(func, 'task_name'):
+            raise ImportError(f'{task_row.name} не помечена @task')
+        payload = json.loads(task_row.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s упала', task_row)
+        error = traceback.format_exc()
+        if task_row.attempts >= task_row.max_attempts:
+            changes = {'status': Task.FAILED}
+        else:
+            changes = {
+                'status': Task.QUEUED,
+                'run_at': timezone.now() + datetime.timedelta(
+                    seconds=retry_delay(task_row.attempts)
+                ),
+            }
+        Task.objects.filter(pk=task_row.pk).update(
+            locked_until=None, last_error=error, **changes
+        )
+        return False
+    Task.objects.filter(pk=task_row.pk).delete()
+    return True
+
+
+def work(stop, poll_interval=1.0, burst=False):
+    """
+    Цикл воркера: выполняет задачи, пока не выставлен stop.
+    При burst выходит, как только очередь опустела.
+    Возвращает число выполненных задач.
+    """
+    done = 0
+    while not stop.is_set():
+        if not connection.in_atomic_block:
+            # Как между запросами: закрыть устаревшие соединения.
+            close_old_connections()
+        task_row = claim_task()
+        if task_row is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        done += run_task(task_row)
+    return done
+
+
+def queue_stats():
+    """
+    Глубина очереди по статусам и задержка: сколько секунд ждет
+    самая старая готовая к выполнению задача.
+    """
+    now = timezone.now()
+    ready = Q(status=Task.QUEUED, run_at__lte=now)
+    stats = Task.objects.aggregate(
+        ready=Count('pk', filter=ready),
+        scheduled=Count('pk', filter=Q(status=Task.QUEUED, run_at__gt=now)),
+        running=Count('pk', filter=Q(status=Task.RUNNING)),
+        failed=Count('pk', filter=Q(status=Task.FAILED)),
+        oldest=Min('run_at', filter=ready),
+    )
+    oldest = stats.pop('oldest')
+    stats['lag'] = (now - oldest).total_seconds() if oldest else 0.0
+    return stats
@@ -0,0 +1,37 @@
+"""
+Шаблонный движок Django, который засчитывает время рендеринга
+в замер текущего запроса (core.timing).
+"""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+
+from core import timing
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None):
+        timings = timing.current()
+        if timings is None:
+            return super().render(context, request)
+        # Вложенный рендеринг уже учтен во внешнем.
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template += time.perf_counter() - started
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django.reraise(exc, self)
@@ -0,0 +1,49 @@
+"""
+Замеры времени текущего запроса: SQL, шаблоны и представление.
+
+ServerTimingMiddleware начинает замер в начале запроса, а запросы к БД
+и рендеринг шаблонов добавляют к нему свое время. Вне запроса
+(management-команды, тесты без middleware) замер не ведется.
+"""
+import threading
+import time
+
+_state = threading.local()
+
+
+class RequestTimings:
+    """Замер одного запроса; служит и оберткой connection.execute_wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+        self.view = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    _state.timings = RequestTimings()
+    return _state.timings
+
+
+def stop():
+    _state.timings = None
+
+
+def current():
+    """Замер текущего запроса или None."""
+    return getattr(_state, 'timings', None)
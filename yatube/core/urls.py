@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('profiles/', views.profiles, name='profiles'),
+    path(
+        'profiles/<slug:profile_id>/',
+        views.profile_detail,
+        name='profile_detail',
+    ),
+]
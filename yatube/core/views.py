@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import collect_gauges, registry
+from core.metrics import render as render_metrics
+from core.profiling import list_profiles, load_profile
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def has_metrics_token(request):
+    """
+    Заголовок Authorization: Bearer <METRICS_TOKEN> (bearer_token
+    в конфигурации Prometheus). Адрес клиента не проверяется: за
+    обратным прокси все запросы приходят с 127.0.0.1.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics(request):
+    """Метрики всех воркеров в формате Prometheus."""
+    if not (request.user.is_staff or has_metrics_token(request)):
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(registry.collect(), collect_gauges()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@staff_member_required
+def profiles(request):
+    """Последние сохраненные профили запросов, самые долгие первыми."""
+    return render(request, 'core/profiles.html', {
+        'profiles': list_profiles(),
+    })
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise Http404('Профиль не найден')
+    return render(request, 'core/profile_detail.html', {'profile': profile})
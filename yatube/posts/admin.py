@@ -1,6 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 
-from .models import Post, Group
+from .cache import group_choices
+from .deletion import schedule_group_deletion
+from .models import Post, Group, GroupDeletion
+from .paginators import EstimatedCountPaginator
+from .search import filter_posts
+
+
+class PostChangeList(ChangeList):
+    def get_queryset(self, request):
+        # Список показывает начало текста, полный text нужен только форме.
+        return super().get_queryset(request).defer('text')
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,10 +23,94 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    # Навигация по годам и месяцам — диапазоны по индексу на pub_date.
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    # Без второго COUNT(*) по всей таблице.
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def get_list_display(self, request):
+        return tuple(
+            'excerpt' if name == 'text' else name
+            for name in super().get_list_display(request)
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """
+        Список групп берется из общего кэша, а не запрашивается
+        в каждой строке редактируемого списка.
+        """
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            formfield.choices = [
+                ('', formfield.empty_label)
+            ] + group_choices()
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE '%...%'."""
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    """
+    Удаление только скрывает группу и создает задание GroupDeletion:
+    посты отвязывает фоновая задача, а не запрос админки.
+    """
+    list_display = ('title', 'slug', 'hidden')
+    list_filter = ('hidden',)
+    search_fields = ('title', 'slug')
+
+    def get_deleted_objects(self, objs, request):
+        # Стандартная страница подтверждения загружает все посты группы.
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(Group._meta.verbose_name)
+        return (
+            [group.title or group.slug for group in objs],
+            {Group._meta.verbose_name_plural: len(objs)},
+            perms_needed,
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        schedule_group_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for group in queryset:
+            schedule_group_deletion(group)
+
+
+class GroupDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'title', 'progress', 'total', 'created', 'updated', 'finished',
+    )
+    list_filter = ('finished',)
+    readonly_fields = (
+        'group', 'title', 'total', 'processed', 'created', 'updated',
+        'finished',
+    )
+    empty_value_display = '-пусто-'
+
+    def progress(self, obj):
+        return f'{obj.percent}% ({obj.processed} из {obj.total})'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(GroupDeletion, GroupDeletionAdmin)
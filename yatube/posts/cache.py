@@ -0,0 +1,161 @@
+"""
+Кэш отрендеренных списков постов в лентах.
+
+У каждой ленты (главная, группа, автор) есть номер версии в кэше.
+Ключ фрагмента включает версию, поэтому запись поста или группы
+инвалидирует фрагменты ленты простым увеличением версии:
+старые фрагменты больше не читаются и вытесняются по таймауту.
+
+Там же хранится общий для всех форм список групп для выбора.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Group
+
+FEED_CACHE_TIMEOUT = getattr(settings, 'FEED_CACHE_TIMEOUT', 60 * 60)
+
+INDEX_FEED = 'index'
+
+GROUP_CHOICES_KEY = 'group-choices'
+
+STATS_KEYS = ('hits', 'misses', 'invalidations')
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def _version_key(feed):
+    return f'feed-version:{feed}'
+
+
+def _modified_key(feed):
+    return f'feed-modified:{feed}'
+
+
+def _stats_key(name):
+    return f'feed-cache:{name}'
+
+
+def feed_version(feed):
+    """
+    Текущая версия ленты.
+    Начальная версия берется от времени, чтобы после вытеснения
+    ключа версии не вернуться к уже закэшированным фрагментам.
+    """
+    key = _version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def feed_modified(feed):
+    """Время последней записи в ленту (timestamp) или None."""
+    return cache.get(_modified_key(feed))
+
+
+def _bump(feeds):
+    now = time.time()
+    for feed in feeds:
+        try:
+            cache.incr(_version_key(feed))
+        except ValueError:
+            # Версии нет в кэше: следующее чтение создаст новую.
+            pass
+        cache.set(_modified_key(feed), now, None)
+
+
+def invalidate_feeds(*feeds):
+    """
+    Инвалидирует фрагменты лент.
+    Версии меняются сразу и еще раз после коммита, чтобы фрагмент,
+    отрендеренный до коммита по старым данным, тоже не остался в кэше.
+    """
+    feeds = set(feeds)
+    _bump(feeds)
+    transaction.on_commit(lambda: _bump(feeds))
+    record_stat('invalidations', len(feeds))
+
+
+def fragment_key(request, feed, page_obj):
+    """
+    Ключ кэша списка постов для страницы ленты.
+    Страница по курсору определяется разобранной позицией, а не сырым
+    ?cursor=: испорченные и устаревшие курсоры показывают первую
+    страницу и попадают в ее ключ, а не плодят новые.
+    """
+    if getattr(page_obj, 'is_cursor', False):
+        if page_obj.position is None:
+            page = 'page:1'
+        else:
+            direction, pub_date, pk = page_obj.position
+            page = f'cursor:{direction}:{pub_date.isoformat()}:{pk}'
+    else:
+        page = f'page:{page_obj.number}'
+    auth = 'auth' if request.user.is_authenticated else 'anon'
+    return f'feed:{feed}:{feed_version(feed)}:{page}:{auth}'
+
+
+def record_stat(name, delta=1):
+    key = _stats_key(name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def feed_cache_stats():
+    """Счетчики попаданий, промахов и инвалидаций кэша лент."""
+    stats = {
+        name: cache.get(_stats_key(name)) or 0 for name in STATS_KEYS
+    }
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def feed_cache_gauges():
+    """Счетчики кэша лент для /metrics (METRICS_GAUGES)."""
+    stats = feed_cache_stats()
+    return [
+        ('yatube_feed_cache_hits', 'Попадания в кэш лент.', stats['hits']),
+        ('yatube_feed_cache_misses', 'Промахи кэша лент.', stats['misses']),
+        (
+            'yatube_feed_cache_invalidations', 'Инвалидации лент.',
+            stats['invalidations'],
+        ),
+        (
+            'yatube_feed_cache_hit_ratio', 'Доля попаданий в кэш лент.',
+            stats['hit_ratio'],
+        ),
+    ]
+
+
+def group_choices():
+    """Пары (id, название) видимых групп для полей выбора группы."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = [
+            (pk, title or '')
+            for pk, title in Group.objects.filter(hidden=False)
+            .order_by('pk').values_list('pk', 'title')
+        ]
+        cache.set(GROUP_CHOICES_KEY, choices, FEED_CACHE_TIMEOUT)
+    return choices
+
+
+def invalidate_group_choices():
+    """Как и версии лент, сбрасывается сразу и после коммита."""
+    cache.delete(GROUP_CHOICES_KEY)
+    transaction.on_commit(lambda: cache.delete(GROUP_CHOICES_KEY))
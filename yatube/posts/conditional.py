@@ -0,0 +1,103 @@
+"""
+Условные GET (ETag / Last-Modified) для лент и страницы поста.
+
+Валидатор строится из версий лент в кэше (posts.cache), которые
+меняются при каждой записи поста или группы, поэтому до рендера
+нужен максимум один запрос по индексу, чтобы найти группу,
+автора или пост.
+"""
+import functools
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import (INDEX_FEED, author_feed, feed_modified, feed_version,
+                    group_feed)
+from .models import Group, Post
+
+User = get_user_model()
+
+
+def feed_validators(request, feeds, timestamps=()):
+    """
+    ETag и Last-Modified страницы, собранной из лент feeds.
+    ETag учитывает адрес с параметрами страницы и пользователя,
+    т.к. шапка и кнопки зависят от авторизации.
+    """
+    parts = [request.get_full_path(), str(request.user.pk)]
+    parts += [f'{feed}:{feed_version(feed)}' for feed in feeds]
+    parts += [str(timestamp) for timestamp in timestamps]
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    modified = [feed_modified(feed) for feed in feeds]
+    if None in modified:
+        return etag, None
+    return etag, int(max(modified + list(timestamps)))
+
+
+def condition_on_feeds(get_validators):
+    """
+    Отвечает 304 Not Modified, если валидаторы совпали с заголовками
+    If-None-Match / If-Modified-Since, и проставляет их в ответ.
+    get_validators(request, *args, **kwargs) возвращает (etag,
+    last_modified) или None, если объекта нет и ответ строит само
+    представление (например, 404).
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            validators = get_validators(request, *args, **kwargs)
+            if validators is None:
+                return view_func(request, *args, **kwargs)
+            etag, last_modified = validators
+            response = get_conditional_response(
+                request, etag=quote_etag(etag), last_modified=last_modified
+            )
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = quote_etag(etag)
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def index_validators(request):
+    return feed_validators(request, [INDEX_FEED])
+
+
+def group_validators(request, slug):
+    group_id = Group.objects.filter(slug=slug, hidden=False).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return feed_validators(request, [group_feed(group_id)])
+
+
+def profile_validators(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return feed_validators(request, [author_feed(author_id)])
+
+
+def post_detail_validators(request, post_id):
+    """Пост зависит от своей правки и от ленты автора (число постов)."""
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'edit_date'
+    ).first()
+    if post is None:
+        return None
+    author_id, edit_date = post
+    return feed_validators(
+        request, [author_feed(author_id)], [edit_date.timestamp()]
+    )
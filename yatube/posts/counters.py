@@ -0,0 +1,70 @@
+"""
+Хранимые счетчики постов.
+
+Счетчики ведутся для каждой ленты: всех постов, группы и автора.
+Счетчик создается при первом чтении (COUNT(*) по ленте) и дальше
+меняется на +1/-1 при записи постов. Пока строки счетчика нет,
+запись ее не трогает: первое чтение посчитает актуальное значение.
+"""
+from django.db.models import F
+
+from .models import Post, PostCounter
+
+
+INDEX_KEY = 'index'
+
+
+def author_key(author_id):
+    return f'author:{author_id}'
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def post_keys(author_id, group_id):
+    """Счетчики лент, в которых показывается пост."""
+    keys = [INDEX_KEY, author_key(author_id)]
+    if group_id is not None:
+        keys.append(group_key(group_id))
+    return keys
+
+
+def get_count(key, queryset):
+    """Значение счетчика key; при отсутствии считает queryset.count()."""
+    value = PostCounter.objects.filter(key=key).values_list(
+        'value', flat=True
+    ).first()
+    if value is None:
+        value = queryset.count()
+        PostCounter.objects.bulk_create(
+            [PostCounter(key=key, value=value)], ignore_conflicts=True
+        )
+    return value
+
+
+def change_count(key, delta):
+    change_counts([key], delta)
+
+
+def change_counts(keys, delta):
+    """Меняет несколько счетчиков одним UPDATE."""
+    if keys:
+        PostCounter.objects.filter(key__in=keys).update(
+            value=F('value') + delta
+        )
+
+
+def author_post_count(author):
+    """Число постов автора без COUNT(*) по таблице постов."""
+    return get_count(
+        author_key(author.pk), Post.objects.filter(author=author)
+    )
+
+
+def index_post_count():
+    return get_count(INDEX_KEY, Post.objects.all())
+
+
+def group_post_count(group):
+    return get_count(group_key(group.pk), Post.objects.filter(group=group))
@@ -0,0 +1,149 @@
+"""
+Удаление авторов без загрузки их постов.
+
+Обычный user.delete() для on_delete=SET загружает все посты автора
+в память и обновляет их через Collector (счетчики и ленты при этом
+поправит сигнал pre_delete). delete_author сначала переносит посты
+на пользователя anonymous пачками, одним UPDATE на пачку, и только
+потом удаляет пользователя: коллектору остается пустой набор постов.
+
+Группы удаляются так же, но в фоне: schedule_group_deletion сразу
+скрывает группу и создает задание GroupDeletion, а run_group_deletion
+(задача delete_group в очереди core.tasks или команда delete_groups)
+отвязывает посты пачками и удаляет группу.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.tasks import task
+from .cache import (INDEX_FEED, author_feed, group_feed, invalidate_feeds,
+                    invalidate_group_choices)
+from .counters import author_key, change_count, group_key
+from .models import (SENTINEL_USERNAME, Group, GroupDeletion, Post,
+                     sentinel_user_id)
+from .tasks import invalidate_group_author_feeds
+
+DELETE_BATCH_SIZE = 5000
+
+
+def reassign_posts(author_id, batch_size=DELETE_BATCH_SIZE):
+    """
+    Переносит посты автора на anonymous и возвращает их число.
+    Каждая пачка — отдельная короткая транзакция вместе с обновлением
+    счетчиков, поэтому прерванный перенос можно просто повторить.
+    Посты самого anonymous переносить некуда: ValueError.
+    """
+    sentinel_id = sentinel_user_id()
+    if author_id == sentinel_id:
+        raise ValueError(
+            f'Пользователя {SENTINEL_USERNAME} удалять нельзя: '
+            'ему передаются посты удаленных авторов.'
+        )
+    posts = Post.objects.filter(author_id=author_id)
+    group_ids = set(
+        posts.exclude(group=None).values_list('group_id', flat=True)
+        .distinct().order_by()
+    )
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                posts.order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            # update() не вызывает сигналы, счетчики правим сами.
+            count = Post.objects.filter(pk__in=batch).update(
+                author_id=sentinel_id
+            )
+            change_count(author_key(author_id), -count)
+            change_count(author_key(sentinel_id), count)
+        moved += count
+    if not moved:
+        return moved
+    invalidate_feeds(
+        INDEX_FEED, author_feed(author_id), author_feed(sentinel_id),
+        *(group_feed(group_id) for group_id in group_ids),
+    )
+    return moved
+
+
+def delete_author(user, batch_size=DELETE_BATCH_SIZE):
+    """Удаляет пользователя, передав его посты anonymous."""
+    moved = reassign_posts(user.pk, batch_size)
+    user.delete()
+    return moved
+
+
+def schedule_group_deletion(group):
+    """Скрывает группу и ставит ее удаление в очередь."""
+    with transaction.atomic():
+        Group.objects.filter(pk=group.pk).update(hidden=True)
+        job, _ = GroupDeletion.objects.get_or_create(
+            group=group,
+            defaults={
+                'title': group.title or group.slug,
+                'total': group.posts.count(),
+            },
+        )
+        # Ссылки на скрытую группу пропадают из лент авторов в фоне.
+        invalidate_group_author_feeds.delay(group.pk)
+        delete_group.delay(job.pk)
+    group.hidden = True
+    invalidate_feeds(group_feed(group.pk), INDEX_FEED)
+    invalidate_group_choices()
+    return job
+
+
+def run_group_deletion(job, batch_size=DELETE_BATCH_SIZE, pause=0):
+    """
+    Отвязывает посты от группы пачками и удаляет группу.
+    Пачка — короткая транзакция, между пачками можно сделать паузу
+    pause секунд для других писателей. Прерванное задание продолжается
+    с оставшихся постов группы.
+    """
+    if job.group_id is not None:
+        posts = Post.objects.filter(group_id=job.group_id)
+        while True:
+            with transaction.atomic():
+                batch = dict(
+                    posts.order_by('pk').values_list('pk', 'author_id')
+                    [:batch_size]
+                )
+                if not batch:
+                    break
+                # Пачку мог уже отвязать воркер, чья аренда задачи истекла:
+                # такие посты не считаем второй раз.
+                count = Post.objects.filter(
+                    pk__in=batch, group_id=job.group_id
+                ).update(group=None)
+                change_count(group_key(job.group_id), -count)
+                GroupDeletion.objects.filter(pk=job.pk).update(
+                    processed=F('processed') + count, updated=timezone.now()
+                )
+            # Если задача invalidate_group_author_feeds еще не успела,
+            # ленты авторов пачки обновляем здесь.
+            invalidate_feeds(
+                *{author_feed(author_id) for author_id in batch.values()}
+            )
+            job.processed += count
+            if pause:
+                time.sleep(pause)
+    with transaction.atomic():
+        # Постов у группы уже нет, коллектору нечего загружать.
+        Group.objects.filter(pk=job.group_id).delete()
+        job.group = None
+        job.finished = timezone.now()
+        job.save(update_fields=['group', 'finished', 'updated'])
+    return job
+
+
+@task
+def delete_group(job_id):
+    """Задача очереди для schedule_group_deletion."""
+    job = GroupDeletion.objects.filter(pk=job_id, finished=None).first()
+    if job is not None:
+        run_group_deletion(job)
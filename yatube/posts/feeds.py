@@ -0,0 +1,148 @@
+"""
+Потоковые ленты постов в форматах RSS, Atom и JSON Feed.
+
+Элементы XML пишут стандартные генераторы django.utils.feedgenerator,
+но посты не собираются в список: они читаются из queryset.iterator()
+пачками и отдаются клиенту по одному через StreamingHttpResponse,
+поэтому память не зависит от ?limit=.
+"""
+import io
+import json
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import feedgenerator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+FEED_DEFAULT_LIMIT = 50
+FEED_MAX_LIMIT = getattr(settings, 'FEED_MAX_LIMIT', 10000)
+FEED_CHUNK_SIZE = 500
+
+XML_FORMATS = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+}
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+JSON_CONTENT_TYPE = 'application/feed+json; charset=utf-8'
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', FEED_DEFAULT_LIMIT))
+    except ValueError:
+        return FEED_DEFAULT_LIMIT
+    return max(1, min(limit, FEED_MAX_LIMIT))
+
+
+def post_item(request, post):
+    """Поля элемента ленты для поста."""
+    link = request.build_absolute_uri(post.get_absolute_url())
+    return {
+        'title': post.text[:50],
+        'link': link,
+        'description': post.text,
+        'unique_id': link,
+        'author_name': post.author.get_full_name() or post.author.username,
+        'pubdate': post.pub_date,
+        'updateddate': post.edit_date,
+        'categories': [post.group.slug] if post.group_id else [],
+    }
+
+
+def stream_xml(feed, items):
+    """
+    Отдает документ по кускам: заголовок канала, затем каждый элемент.
+    Первый пост добавляется в ленту до заголовка, чтобы генератор
+    взял из него дату обновления канала.
+    """
+    is_rss = isinstance(feed, feedgenerator.Rss201rev2Feed)
+    item_element = 'item' if is_rss else 'entry'
+    buffer = io.StringIO()
+    handler = SimplerXMLGenerator(buffer, 'utf-8')
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    def write_item(item):
+        handler.startElement(item_element, feed.item_attributes(item))
+        feed.add_item_elements(handler, item)
+        handler.endElement(item_element)
+        return flush()
+
+    first = next(items, None)
+    if first is not None:
+        feed.add_item(**first)
+    handler.startDocument()
+    if is_rss:
+        handler.startElement('rss', feed.rss_attributes())
+        handler.startElement('channel', feed.root_attributes())
+    else:
+        handler.startElement('feed', feed.root_attributes())
+    feed.add_root_elements(handler)
+    yield flush()
+    if first is not None:
+        yield write_item(feed.items.pop())
+    for item in items:
+        feed.add_item(**item)
+        yield write_item(feed.items.pop())
+    if is_rss:
+        handler.endElement('channel')
+    handler.endElement('rss' if is_rss else 'feed')
+    yield flush()
+
+
+def stream_json(title, link, feed_url, items):
+    header = {
+        'version': JSON_FEED_VERSION,
+        'title': title,
+        'home_page_url': link,
+        'feed_url': feed_url,
+    }
+    yield json.dumps(header, ensure_ascii=False)[:-1] + ', "items": ['
+    for number, item in enumerate(items):
+        entry = {
+            'id': item['unique_id'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_text': item['description'],
+            'date_published': item['pubdate'].isoformat(),
+            'date_modified': item['updateddate'].isoformat(),
+            'authors': [{'name': item['author_name']}],
+            'tags': item['categories'],
+        }
+        separator = ', ' if number else ''
+        yield separator + json.dumps(entry, ensure_ascii=False)
+    yield ']}'
+
+
+def feed_response(request, title, link, posts):
+    """
+    Потоковый ответ с лентой постов.
+    Формат задает ?format=rss|atom|json, число постов ?limit=.
+    """
+    feed_format = request.GET.get('format', 'rss')
+    if feed_format not in XML_FORMATS and feed_format != 'json':
+        raise Http404(f'Неизвестный формат ленты: {feed_format}')
+    posts = posts.select_related('author', 'group')[:get_limit(request)]
+    items = (
+        post_item(request, post)
+        for post in posts.iterator(chunk_size=FEED_CHUNK_SIZE)
+    )
+    link = request.build_absolute_uri(link)
+    feed_url = request.build_absolute_uri(request.path)
+    if feed_format == 'json':
+        return StreamingHttpResponse(
+            stream_json(title, link, feed_url, items),
+            content_type=JSON_CONTENT_TYPE,
+        )
+    feed = XML_FORMATS[feed_format](
+        title=title, link=link, description=title, feed_url=feed_url,
+        language=settings.LANGUAGE_CODE,
+    )
+    return StreamingHttpResponse(
+        stream_xml(feed, items),
+        content_type=feed.content_type,
+    )
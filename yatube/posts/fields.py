@@ -0,0 +1,63 @@
+"""
+Поля, вычисляемые из текста поста при сохранении.
+
+Значение считается в pre_save, который Django вызывает и для save(),
+и для bulk_create, поэтому начало текста и длина не расходятся с самим
+текстом при любой вставке. QuerySet.update() pre_save не вызывает:
+текст постов меняется только через save().
+"""
+from django.db import models
+
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length):
+    """
+    Начало текста не длиннее length символов.
+    Обрезается по границе слова, если она не раньше середины.
+    """
+    if len(text) <= length:
+        return text
+    cut = text[:length - len(ELLIPSIS)]
+    boundary = cut.rstrip().rfind(' ')
+    if boundary >= length // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + ELLIPSIS
+
+
+class DerivedFieldMixin:
+    def __init__(self, *args, source='text', **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'text':
+            kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def derive(self, value):
+        raise NotImplementedError
+
+    def pre_save(self, model_instance, add):
+        if self.source in model_instance.get_deferred_fields():
+            # Текст не загружен и не сохраняется: значение не меняется.
+            return getattr(model_instance, self.attname)
+        value = self.derive(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class ExcerptField(DerivedFieldMixin, models.CharField):
+    """Начало текста для лент."""
+
+    def derive(self, value):
+        return make_excerpt(value, self.max_length)
+
+
+class TextLengthField(DerivedFieldMixin, models.PositiveIntegerField):
+    """Длина текста в символах."""
+
+    def derive(self, value):
+        return len(value)
@@ -1,5 +1,24 @@
 from django import forms
-from .models import Post
+from django.forms.models import ModelChoiceIterator
+from django.urls import reverse_lazy
+
+from .cache import group_choices
+from .models import Group, Post
+
+
+class CachedGroupChoiceIterator(ModelChoiceIterator):
+    """
+    Варианты групп из кэша вместо запроса всех групп на каждую форму.
+    Выбранная группа при отправке проверяется поиском по первичному ключу.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        yield from group_choices()
+
+    def __len__(self):
+        return len(group_choices()) + (self.field.empty_label is not None)
 
 
 class PostForm(forms.ModelForm):
@@ -15,3 +34,13 @@ class PostForm(forms.ModelForm):
             'text': ('Введите текст поста'),
             'group': ('Выберите группу поста (опционально)')
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group = self.fields['group']
+        group.queryset = Group.objects.filter(hidden=False)
+        group.iterator = CachedGroupChoiceIterator
+        group.widget.choices = group.choices
+        group.widget.attrs['data-autocomplete-url'] = reverse_lazy(
+            'posts:group_autocomplete'
+        )
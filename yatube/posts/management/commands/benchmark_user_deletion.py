@@ -0,0 +1,69 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.decorators import QueryCounter
+from posts.deletion import DELETE_BATCH_SIZE, delete_author
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает автора с --posts постами и замеряет время, пик памяти и '
+        'число запросов при его удалении через posts.deletion.delete_author '
+        'и, с --collector, через обычный user.delete(). Все изменения '
+        'откатываются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--collector', action='store_true',
+            help='Замерить и удаление через Collector для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        methods = [('set_based', lambda user: delete_author(
+            user, options['batch_size']
+        ))]
+        if options['collector']:
+            methods.append(('collector', lambda user: user.delete()))
+        with transaction.atomic():
+            for name, delete in methods:
+                result = self.measure(name, delete, options['posts'])
+                self.stdout.write(
+                    f'{name:<10} {result["seconds"]:.2f} с, '
+                    f'пик памяти {result["peak_mb"]:.1f} МБ, '
+                    f'запросов {result["queries"]}'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, name, delete, count):
+        user = User.objects.create(username=f'benchmark_delete_{name}')
+        for start in range(0, count, 5000):
+            Post.objects.bulk_create(
+                Post(author=user, text=f'Пост {number}')
+                for number in range(start, min(start + 5000, count))
+            )
+        counter = QueryCounter()
+        tracemalloc.start()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            delete(user)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert not Post.objects.filter(author_id=user.pk).exists()
+        return {
+            'seconds': seconds,
+            'peak_mb': peak / 1024 / 1024,
+            'queries': counter.count,
+        }
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import DELETE_BATCH_SIZE, run_group_deletion
+from posts.models import GroupDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет незавершенные удаления групп: отвязывает посты пачками '
+        'и удаляет группы. Обычно удаления выполняет очередь задач '
+        '(run_workers); команда доделывает их без воркеров, прерванное '
+        'удаление продолжается с того же места.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETE_BATCH_SIZE,
+            help='Сколько постов отвязывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками, сек.',
+        )
+
+    def handle(self, *args, **options):
+        jobs = GroupDeletion.objects.filter(finished=None).order_by('pk')
+        for job in jobs:
+            run_group_deletion(job, options['batch_size'], options['pause'])
+            self.stdout.write(
+                f'Группа «{job.title}» удалена, '
+                f'отвязано постов: {job.processed}'
+            )
@@ -0,0 +1,145 @@
+import csv
+import gzip
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts.models import Post
+
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date', 'edit_date')
+FORMATS = ('jsonl', 'csv')
+
+
+def parse_moment(value):
+    """Дата или дата со временем из аргумента командной строки."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Не удалось разобрать дату: {value}')
+        moment = timezone.datetime.combine(day, timezone.datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+class PartWriter:
+    """Пишет строки в файлы частей по part_size строк в каждой."""
+
+    def __init__(self, prefix, output_format, part_size, compress):
+        self.prefix = prefix
+        self.output_format = output_format
+        self.part_size = part_size
+        self.compress = compress
+        self.paths = []
+        self.file = None
+        self.rows_in_part = 0
+
+    def open_part(self):
+        self.close()
+        path = f'{self.prefix}-{len(self.paths) + 1:05d}.{self.output_format}'
+        if self.compress:
+            path += '.gz'
+            self.file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline='')
+        if self.output_format == 'csv':
+            self.csv_writer = csv.DictWriter(self.file, FIELDS)
+            self.csv_writer.writeheader()
+        self.paths.append(path)
+        self.rows_in_part = 0
+
+    def write(self, row):
+        if self.file is None or self.rows_in_part >= self.part_size:
+            self.open_part()
+        if self.output_format == 'csv':
+            self.csv_writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.rows_in_part += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты в JSONL или CSV (по умолчанию сжатые gzip) '
+        'частями по --part-size строк. Посты читаются пачками по ключу '
+        '(pub_date, id), поэтому память не зависит от размера таблицы. '
+        'Формат совместим с import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefix', help='Префикс файлов: <prefix>-00001.jsonl.gz',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--since', help='Посты с этой даты.')
+        parser.add_argument('--until', help='Посты до этой даты.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Имя автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--part-size', type=int, default=1000000)
+        parser.add_argument(
+            '--no-compress', action='store_true',
+            help='Писать файлы без gzip.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['since']:
+            posts = posts.filter(pub_date__gte=parse_moment(options['since']))
+        if options['until']:
+            posts = posts.filter(pub_date__lt=parse_moment(options['until']))
+        if options['group']:
+            posts = posts.filter(group__slug=options['group'])
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+
+        writer = PartWriter(
+            options['prefix'], options['format'], options['part_size'],
+            not options['no_compress'],
+        )
+        exported = 0
+        try:
+            for row in self.iterate(posts, options['chunk_size']):
+                writer.write(row)
+                exported += 1
+        finally:
+            writer.close()
+        self.stdout.write(f'Выгружено постов: {exported}')
+        for path in writer.paths:
+            self.stdout.write(path)
+
+    def iterate(self, posts, chunk_size):
+        """
+        Посты по возрастанию (pub_date, id) пачками по chunk_size.
+        Каждая пачка начинается после последнего ключа предыдущей,
+        поэтому запрос идет диапазоном по индексу ленты без OFFSET.
+        """
+        posts = posts.order_by('pub_date', 'pk').values(
+            'id', 'text', 'pub_date', 'edit_date',
+            author_name=F('author__username'), group_slug=F('group__slug'),
+        )
+        chunk = list(posts[:chunk_size])
+        while chunk:
+            for post in chunk:
+                yield {
+                    'id': post['id'],
+                    'text': post['text'],
+                    'author': post['author_name'],
+                    'group': post['group_slug'] or '',
+                    'pub_date': post['pub_date'].isoformat(),
+                    'edit_date': post['edit_date'].isoformat(),
+                }
+            last = chunk[-1]
+            chunk = list(posts.filter(
+                Q(pub_date__gte=last['pub_date'])
+                & ~Q(pub_date=last['pub_date'], pk__lte=last['id'])
+            )[:chunk_size])
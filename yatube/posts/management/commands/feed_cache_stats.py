@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import feed_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания, промахи и инвалидации кэша лент. '
+        'С локальным кэшем процесса (LocMemCache) команда их не видит: '
+        'счетчики веб-процесса отдает /metrics (yatube_feed_cache_*).'
+    )
+
+    def handle(self, *args, **options):
+        stats = feed_cache_stats()
+        self.stdout.write(
+            f'hits: {stats["hits"]}\n'
+            f'misses: {stats["misses"]}\n'
+            f'hit_ratio: {stats["hit_ratio"]:.2%}\n'
+            f'invalidations: {stats["invalidations"]}'
+        )
@@ -0,0 +1,182 @@
+import csv
+import gzip
+import itertools
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.cache import (INDEX_FEED, author_feed, group_feed,
+                         invalidate_feeds)
+from posts.counters import (INDEX_KEY, author_key, change_count,
+                            group_key)
+from posts.models import Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+
+
+@contextmanager
+def preserve_post_dates():
+    """
+    Отключает auto_now_add/auto_now у дат поста:
+    иначе bulk_create перезапишет даты из файла текущим временем.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'), Post._meta.get_field('edit_date')
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def open_input(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_rows(source, input_format):
+    """Строки файла как словари с ключами text, author, group, pub_date."""
+    if input_format == 'csv':
+        yield from csv.DictReader(source)
+        return
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из JSONL или CSV (можно .gz) пачками через '
+        'bulk_create. Поля: text, author (username), group (slug), '
+        'pub_date (ISO 8601). Повторный запуск продолжает с последней '
+        'сохраненной пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать импорт заново, забыв сохраненную позицию.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or self.detect_format(path)
+        source_name = os.path.abspath(path)
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=source_name
+        )
+        if options['restart']:
+            checkpoint.position = checkpoint.imported = 0
+            checkpoint.save()
+        elif checkpoint.position:
+            self.stdout.write(
+                f'Продолжаем с записи {checkpoint.position}, '
+                f'уже импортировано {checkpoint.imported}'
+            )
+
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.skipped = 0
+        started = time.monotonic()
+        imported = 0
+        with open_input(path) as source, preserve_post_dates():
+            rows = itertools.islice(
+                read_rows(source, input_format), checkpoint.position, None
+            )
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                imported += self.import_batch(checkpoint, batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Импортировано {checkpoint.imported}, '
+                    f'пропущено {self.skipped}, '
+                    f'{imported / elapsed if elapsed else 0:.0f} постов в сек.'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} постов за {time.monotonic() - started:.1f} с'
+        ))
+
+    def detect_format(self, path):
+        name = path[:-3] if path.endswith('.gz') else path
+        extension = os.path.splitext(name)[1].lstrip('.')
+        if extension not in FORMATS:
+            raise CommandError(
+                'Не удалось определить формат файла, укажите --format.'
+            )
+        return extension
+
+    def build_post(self, row):
+        """
+        Пост из строки файла или None, если в строке нет текста,
+        дата не разбирается или не найдены автор или группа.
+        """
+        author_id = self.authors.get(row.get('author'))
+        group_slug = row.get('group') or None
+        group_id = self.groups.get(group_slug)
+        pub_date = timezone.now()
+        if row.get('pub_date'):
+            try:
+                pub_date = parse_datetime(row['pub_date'])
+            except ValueError:
+                pub_date = None
+        if (
+            not row.get('text') or author_id is None or pub_date is None
+            or (group_slug and group_id is None)
+        ):
+            self.skipped += 1
+            return None
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date, timezone.utc)
+        return Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            edit_date=pub_date,
+        )
+
+    @transaction.atomic
+    def import_batch(self, checkpoint, batch):
+        posts = [post for post in map(self.build_post, batch) if post]
+        Post.objects.bulk_create(posts)
+        # bulk_create не вызывает сигналы, счетчики и кэш лент
+        # обновляем сами в той же транзакции.
+        per_author = Counter(post.author_id for post in posts)
+        for author_id, count in per_author.items():
+            change_count(author_key(author_id), count)
+        per_group = Counter(post.group_id for post in posts if post.group_id)
+        for group_id, count in per_group.items():
+            change_count(group_key(group_id), count)
+        change_count(INDEX_KEY, len(posts))
+        invalidate_feeds(
+            INDEX_FEED,
+            *(author_feed(author_id) for author_id in per_author),
+            *(group_feed(group_id) for group_id in per_group),
+        )
+        checkpoint.position += len(batch)
+        checkpoint.imported += len(posts)
+        checkpoint.save()
+        return len(posts)
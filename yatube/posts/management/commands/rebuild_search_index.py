@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.search import FTS_TABLE, uses_fts
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает полнотекстовый индекс постов, читая posts_post '
+        'пачками по id. Новые посты индексируют триггеры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько постов индексировать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        if not uses_fts():
+            raise CommandError('Индекс FTS5 есть только у SQLite.')
+        chunk_size = options['chunk_size']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT MAX(id) FROM posts_post')
+            max_id = cursor.fetchone()[0] or 0
+            with transaction.atomic():
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                    f"VALUES ('delete-all')"
+                )
+            last_id = indexed = 0
+            while last_id < max_id:
+                cursor.execute(
+                    'SELECT id FROM posts_post WHERE id > %s AND id <= %s '
+                    'ORDER BY id LIMIT %s',
+                    [last_id, max_id, chunk_size],
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                with transaction.atomic():
+                    cursor.execute(
+                        f'INSERT INTO {FTS_TABLE}(rowid, text) '
+                        f'SELECT id, text FROM posts_post '
+                        f'WHERE id BETWEEN %s AND %s',
+                        [ids[0], ids[-1]],
+                    )
+                last_id = ids[-1]
+                indexed += len(ids)
+                self.stdout.write(f'Проиндексировано постов: {indexed}')
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+            )
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен.'))
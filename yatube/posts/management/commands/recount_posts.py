@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.counters import INDEX_KEY, author_key, group_key
+from posts.models import Group, Post, PostCounter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает хранимые счетчики постов лент пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько авторов или групп пересчитывать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = fixed = 0
+        for model, field, make_key in (
+            (User, 'author_id', author_key),
+            (Group, 'group_id', group_key),
+        ):
+            last_pk = 0
+            while True:
+                ids = list(
+                    model.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                last_pk = ids[-1]
+                checked += len(ids)
+                fixed += self.recount_batch(field, make_key, ids)
+        with transaction.atomic():
+            fixed += self.recount({INDEX_KEY: Post.objects.count()})
+        checked += 1
+        self.stdout.write(
+            f'Проверено счетчиков: {checked}, исправлено: {fixed}'
+        )
+
+    @transaction.atomic
+    def recount_batch(self, field, make_key, ids):
+        actual = dict(
+            Post.objects.filter(**{f'{field}__in': ids})
+            .values_list(field)
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        return self.recount({
+            make_key(pk): actual.get(pk, 0) for pk in ids
+        })
+
+    def recount(self, values):
+        """
+        Сверяет счетчики с values (ключ -> число постов) внутри транзакции
+        вызывающего, возвращает число исправленных.
+        """
+        counters = PostCounter.objects.select_for_update().in_bulk(
+            list(values)
+        )
+        changed, missing = [], []
+        for key, value in values.items():
+            counter = counters.get(key)
+            if counter is None:
+                missing.append(PostCounter(key=key, value=value))
+            elif counter.value != value:
+                counter.value = value
+                changed.append(counter)
+        PostCounter.objects.bulk_update(changed, ['value'])
+        PostCounter.objects.bulk_create(missing, ignore_conflicts=True)
+        return len(changed) + len(missing)
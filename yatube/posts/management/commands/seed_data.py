@@ -0,0 +1,122 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker import Faker
+
+from posts.cache import (INDEX_FEED, author_feed, group_feed,
+                         invalidate_feeds, invalidate_group_choices)
+from posts.counters import INDEX_KEY, author_key, group_key
+from posts.models import Group, Post, PostCounter
+
+User = get_user_model()
+
+VOCABULARY_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу тестовыми пользователями, группами и постами '
+        'через bulk_create. При одинаковом --seed данные одинаковые.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        Faker.seed(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        author_ids = self.seed_users(options['users'])
+        group_ids = self.seed_groups(options['groups'])
+        self.seed_posts(options['posts'], author_ids, group_ids)
+
+        # bulk_create не вызывает сигналы: счетчики лент посчитаются
+        # заново при первом чтении, кэш лент и список групп сбрасываем сами.
+        PostCounter.objects.filter(key__in=[
+            INDEX_KEY,
+            *(author_key(author_id) for author_id in author_ids),
+            *(group_key(group_id) for group_id in group_ids),
+        ]).delete()
+        invalidate_feeds(
+            INDEX_FEED,
+            *(author_feed(author_id) for author_id in author_ids),
+            *(group_feed(group_id) for group_id in group_ids),
+        )
+        invalidate_group_choices()
+
+    def seed_users(self, count):
+        password = make_password(None)
+        users = (
+            User(
+                username=f'seed_user_{i}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            ) for i in range(count)
+        )
+        self.bulk_create(User, users, count)
+        return list(
+            User.objects.filter(username__startswith='seed_user_')
+            .values_list('pk', flat=True)
+        )
+
+    def seed_groups(self, count):
+        groups = (
+            Group(
+                title=self.fake.sentence(nb_words=3)[:200],
+                slug=f'seed-group-{i}',
+                description=self.fake.sentence(),
+            ) for i in range(count)
+        )
+        self.bulk_create(Group, groups, count)
+        return list(
+            Group.objects.filter(slug__startswith='seed-group-')
+            .values_list('pk', flat=True)
+        )
+
+    def seed_posts(self, count, author_ids, group_ids):
+        if not author_ids:
+            return
+        # Текст собирается из заранее выбранного словаря:
+        # Faker на каждый пост слишком медленный для миллионов строк.
+        words = self.fake.words(nb=VOCABULARY_SIZE)
+        group_choices = group_ids + [None]
+        posts = (
+            Post(
+                author_id=self.random.choice(author_ids),
+                group_id=self.random.choice(group_choices),
+                text=' '.join(
+                    self.random.choices(words, k=self.random.randint(5, 60))
+                ).capitalize(),
+            ) for _ in range(count)
+        )
+        self.bulk_create(Post, posts, count)
+
+    def bulk_create(self, model, objects, count):
+        name = model._meta.verbose_name_plural
+        started = time.monotonic()
+        created = 0
+        while created < count:
+            batch = [
+                obj for _, obj in zip(
+                    range(min(self.batch_size, count - created)), objects
+                )
+            ]
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{name}: {created}/{count} '
+                f'({created / elapsed if elapsed else 0:.0f} в сек.)'
+            )
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+import posts.search
+
+
+class Migration(migrations.Migration):
+    """
+    Индекс FTS5 для поиска по постам (только SQLite).
+    Существующие посты индексирует команда rebuild_search_index.
+    """
+
+    dependencies = [
+        ('posts', '0004_post_edit_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            posts.search.create_index, posts.search.drop_index
+        ),
+    ]
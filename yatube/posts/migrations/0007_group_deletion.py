@@ -0,0 +1,37 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыта'),
+        ),
+        migrations.CreateModel(
+            name='GroupDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Группа')),
+                ('total', models.IntegerField(default=0, verbose_name='Постов')),
+                ('processed', models.IntegerField(default=0, verbose_name='Отвязано')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('group', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'удаление группы',
+                'verbose_name_plural': 'удаления групп',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:56
+
+from django.db import migrations
+
+import posts.fields
+import posts.search
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    length = Post._meta.get_field('excerpt').max_length
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk')
+            .only('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for post in batch:
+            post.excerpt = posts.fields.make_excerpt(post.text, length)
+            post.text_length = len(post.text)
+        Post.objects.bulk_update(batch, ['excerpt', 'text_length'])
+        last_pk = batch[-1].pk
+
+
+def create_triggers(apps, schema_editor):
+    # AddField на SQLite пересоздает posts_post вместе с триггерами FTS.
+    posts.search.create_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_group_deletion'),
+    ]
+
+    operations = [
+        # Откат удаляет поля, что тоже пересоздает таблицу.
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=posts.fields.ExcerptField(default='', editable=False, max_length=300, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_length',
+            field=posts.fields.TextLengthField(default=0, editable=False, verbose_name='Длина текста'),
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
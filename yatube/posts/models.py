@@ -1,11 +1,39 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from .fields import ExcerptField, TextLengthField
 
 User = get_user_model()
 
+SENTINEL_USERNAME = 'anonymous'
+SENTINEL_CACHE_KEY = 'sentinel-user-id'
+
+EXCERPT_LENGTH = 300
+
+
+def sentinel_user_id():
+    """
+    id пользователя anonymous, которому переходят посты удаленных.
+    В кэш id попадает только после коммита: при откате созданного
+    здесь пользователя его id достанется другому.
+    """
+    user_id = cache.get(SENTINEL_CACHE_KEY)
+    if user_id is None:
+        user_id = User.objects.get_or_create(username=SENTINEL_USERNAME)[0].pk
+        transaction.on_commit(
+            lambda: cache.set(SENTINEL_CACHE_KEY, user_id, None)
+        )
+    return user_id
+
 
 def delete_user():
-    User.objects.get_or_create(username='anonymous')[0]
+    """
+    Значение author для постов удаленного пользователя.
+    Быстрый путь без загрузки постов — posts.deletion.delete_author.
+    """
+    return sentinel_user_id()
 
 
 class Group(models.Model):
@@ -13,6 +41,9 @@ class Group(models.Model):
     title = models.CharField(max_length=200, blank=True, null=True)
     description = models.TextField(max_length=200)
     slug = models.SlugField(unique=True)
+    # Группа в очереди на удаление (posts.deletion): ее страница уже
+    # недоступна, а посты отвязываются в фоне.
+    hidden = models.BooleanField('Скрыта', default=False)
 
     def __str__(self) -> str:
         return self.title
@@ -25,16 +56,28 @@ class Post(models.Model):
         связь с таблицей пользователей.
         При удалении выполенении функции выставления anonymous в поле
         пользователя. Реализовал, для тестирования функционала действий при
-        удалении.
+        удалении. Для авторов с большим числом постов удаляйте через
+        posts.deletion.delete_author.
     group:
         связь с таблицей групп.
-        При удалении группы, в постах просто ставим NULL
+        При удалении группы, в постах просто ставим NULL.
+        Большие группы удаляйте через posts.deletion.schedule_group_deletion.
+    edit_date:
+        время последнего сохранения поста, валидатор для условных GET.
+    excerpt, text_length:
+        начало текста и его длина, пересчитываются при сохранении.
+        Ленты загружают их вместо полного text (defer('text')).
     """
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста',
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    edit_date = models.DateTimeField('Дата изменения', auto_now=True)
+    excerpt = ExcerptField(
+        'Начало текста', max_length=EXCERPT_LENGTH, default='',
+    )
+    text_length = TextLengthField('Длина текста', default=0)
     author = models.ForeignKey(
         User,
         on_delete=models.SET(delete_user),
@@ -52,7 +95,99 @@ class Post(models.Model):
     )
 
     def __str__(self) -> str:
-        return self.text[:15]
+        # До первого save() excerpt еще не посчитан.
+        if not self.excerpt and 'text' not in self.get_deferred_fields():
+            return self.text[:15]
+        return self.excerpt[:15]
+
+    @property
+    def is_truncated(self):
+        return self.text_length > len(self.excerpt)
+
+    def get_absolute_url(self):
+        return reverse('posts:post_detail', kwargs={'post_id': self.pk})
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Индексы повторяют порядок лент, поэтому выборка страницы
+        # идет диапазоном по индексу без отдельной сортировки.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
+
+
+class PostCounter(models.Model):
+    """
+    Хранимый счетчик постов.
+    key определяет ленту, например 'author:<id>'.
+    Значение поддерживается сигналами posts.signals,
+    а разошедшиеся счетчики пересчитывает команда recount_posts.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.key}: {self.value}'
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Позиция импорта постов из файла (команда import_posts).
+    Обновляется в той же транзакции, что и пачка постов,
+    поэтому после сбоя импорт продолжается без дублей.
+    """
+    source = models.CharField(max_length=255, unique=True)
+    position = models.BigIntegerField(default=0)
+    imported = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.source}: {self.position}'
+
+
+class GroupDeletion(models.Model):
+    """
+    Фоновое удаление группы (команда delete_groups).
+    processed растет в той же транзакции, что и пачка отвязанных постов,
+    поэтому прогресс верен и после прерывания задания.
+    """
+    group = models.OneToOneField(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='deletion',
+    )
+    title = models.CharField('Группа', max_length=200)
+    total = models.IntegerField('Постов', default=0)
+    processed = models.IntegerField('Отвязано', default=0)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+    finished = models.DateTimeField('Завершено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'удаление группы'
+        verbose_name_plural = 'удаления групп'
+
+    def __str__(self) -> str:
+        return self.title
+
+    @property
+    def percent(self):
+        if self.finished is not None:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
@@ -0,0 +1,263 @@
+"""
+Пагинация лент постов.
+
+Кроме обычной постраничной навигации (?page=) поддерживается навигация
+по курсору (?cursor=). Курсор хранит ключ (pub_date, id) крайнего поста
+страницы, поэтому следующая страница выбирается условием по индексу,
+без COUNT(*) и OFFSET: время ответа не зависит от глубины страницы.
+
+Обычная навигация берет число постов из хранимого счетчика ленты
+(posts.counters) и показывает только окно номеров вокруг текущей
+страницы, а не ссылку на каждую страницу.
+"""
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+POSTS_COUNT = 10
+GROUPS_COUNT = 20
+
+# Номеров по сторонам от текущей страницы и в начале и конце навигации.
+PAGES_ON_EACH_SIDE = 3
+PAGES_ON_ENDS = 2
+
+# Выше этого числа строк админка показывает оценку вместо COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = getattr(
+    settings, 'ESTIMATED_COUNT_THRESHOLD', 100000
+)
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+def encode_cursor(post, direction):
+    """Упаковывает ключ поста и направление в непрозрачный токен."""
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Распаковывает токен курсора.
+    Возвращает (direction, pub_date, pk) или None, если токен испорчен.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage(Sequence):
+    """Страница ленты, полученная по курсору."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 position=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        # Разобранный курсор (direction, pub_date, pk); None — первая страница.
+        self.position = position
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(self.object_list[-1], CURSOR_NEXT)
+
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(self.object_list[0], CURSOR_PREVIOUS)
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинатор по ключу (-pub_date, -id).
+    Выбирает на одну запись больше страницы, чтобы узнать,
+    есть ли записи дальше.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list.order_by('-pub_date', '-pk')
+        self.per_page = per_page
+
+    def get_page(self, cursor):
+        """
+        Возвращает страницу после (или до) курсора.
+        Пустой или испорченный курсор, а также курсор за краем ленты
+        (устаревшая ссылка) дают первую страницу.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        if position is not None:
+            page = self._get_page_at(*position)
+            if page.object_list:
+                page.position = position
+                return page
+        rows = list(self.object_list[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page], self,
+            has_next=len(rows) > self.per_page,
+            has_previous=False,
+        )
+
+    def _get_page_at(self, direction, pub_date, pk):
+        if direction == CURSOR_NEXT:
+            # pub_date <= X дает диапазон по индексу,
+            # второе условие отсекает уже показанные записи с той же датой.
+            posts = self.object_list.filter(
+                Q(pub_date__lte=pub_date) & ~Q(pub_date=pub_date, pk__gte=pk)
+            )
+            rows = list(posts[:self.per_page + 1])
+            return CursorPage(
+                rows[:self.per_page], self,
+                has_next=len(rows) > self.per_page,
+                has_previous=True,
+            )
+        posts = self.object_list.filter(
+            Q(pub_date__gte=pub_date) & ~Q(pub_date=pub_date, pk__lte=pk)
+        ).order_by('pub_date', 'pk')
+        rows = list(posts[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page][::-1], self,
+            has_next=True,
+            has_previous=len(rows) > self.per_page,
+        )
+
+
+class WindowedPage(Page):
+    @cached_property
+    def page_window(self):
+        """Номера страниц для навигации, пропуски — FeedPaginator.ELLIPSIS."""
+        return list(self.paginator.get_elided_page_range(self.number))
+
+
+class FeedPaginator(Paginator):
+    """
+    Пагинатор лент.
+    count можно передать готовым (из счетчика ленты), тогда COUNT(*)
+    не выполняется. Если счетчик разошелся с таблицей, крайние страницы
+    окажутся пустыми или недоступными до пересчета (recount_posts).
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            # Заполняем cached_property count.
+            self.__dict__['count'] = count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1,
+                              on_each_side=PAGES_ON_EACH_SIDE,
+                              on_ends=PAGES_ON_ENDS):
+        """
+        Номера страниц вокруг number и по краям, с ELLIPSIS на месте
+        пропущенных (как Paginator.get_elided_page_range в Django 3.2).
+        """
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+
+def get_page_obj(request, posts, count=None):
+    """
+    Страница ленты для запроса.
+    Параметр ?cursor= включает навигацию по курсору,
+    иначе работает обычная навигация по ?page=.
+    count — число постов ленты, если оно уже известно.
+    """
+    if 'cursor' in request.GET:
+        paginator = CursorPaginator(posts, POSTS_COUNT)
+        return paginator.get_page(request.GET['cursor'])
+    paginator = FeedPaginator(posts, POSTS_COUNT, count)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def estimate_table_rows(queryset):
+    """
+    Быстрая оценка числа строк таблицы без COUNT(*) или None,
+    если база не умеет ее давать.
+    """
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # id только растут, поэтому MAX(rowid) не меньше числа строк.
+            cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для больших таблиц.
+    Строки считаются не дальше ESTIMATED_COUNT_THRESHOLD; если их больше,
+    для таблицы без фильтров берется оценка из статистики базы,
+    а для выборки с фильтрами — сам порог.
+    """
+
+    @cached_property
+    def count(self):
+        limit = ESTIMATED_COUNT_THRESHOLD
+        count = self.object_list[:limit + 1].count()
+        if count <= limit:
+            return count
+        if not self.object_list.query.where:
+            return max(estimate_table_rows(self.object_list) or 0, count)
+        return count
@@ -0,0 +1,170 @@
+"""
+Полнотекстовый поиск по постам.
+
+На SQLite поиск идет по индексу FTS5 posts_post_fts, который хранит
+только словарь и ссылается на строки posts_post (external content).
+Индекс синхронизируют триггеры на вставку, правку текста и удаление,
+поэтому в него попадают и записи через bulk_create/update.
+Для других СУБД остается поиск по подстроке.
+"""
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .paginators import CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+
+# Триггеры пропадают, когда миграция SQLite пересоздает таблицу
+# posts_post, поэтому такие миграции должны вызывать create_triggers.
+TRIGGERS_SQL = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+
+
+def create_triggers(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_INDEX_SQL)
+    create_triggers(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in ('insert', 'delete', 'update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{name}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """
+    Запрос FTS5 из пользовательского ввода.
+    Каждое слово берется в кавычки, чтобы операторы и спецсимволы
+    FTS5 не ломали запрос; слова объединяются по И.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, найденные по запросу."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not uses_fts():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    ))
+
+
+def encode_cursor(rank, pk):
+    raw = f'{rank!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        rank, pk = base64.urlsafe_b64decode(padded.encode()).decode().split(
+            '|'
+        )
+        return float(rank), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class SearchPage:
+    """Страница результатов поиска, отсортированных по релевантности."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self._next_cursor = next_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._next_cursor is not None
+
+    def next_cursor(self):
+        return self._next_cursor
+
+
+def search_posts(query, cursor, per_page):
+    """
+    Страница результатов поиска после курсора.
+    На FTS5 порядок задает ключ (rank, id): rank (bm25) меньше
+    у более релевантных постов.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return SearchPage([], None)
+    posts = Post.objects.select_related('author', 'group').defer('text')
+    if not uses_fts():
+        page = CursorPaginator(
+            filter_posts(posts, query), per_page
+        ).get_page(cursor)
+        return SearchPage(page.object_list, page.next_cursor())
+
+    sql = (
+        f'SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [expression]
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        rank, pk = position
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [rank, rank, pk]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+
+    found = posts.in_bulk([pk for pk, _ in rows[:per_page]])
+    object_list = [found[pk] for pk, _ in rows[:per_page] if pk in found]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor(rows[per_page - 1][1],
+                                    rows[per_page - 1][0])
+    return SearchPage(object_list, next_cursor)
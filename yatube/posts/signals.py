@@ -0,0 +1,110 @@
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .cache import (INDEX_FEED, author_feed, group_feed, invalidate_feeds,
+                    invalidate_group_choices)
+from .counters import author_key, change_counts, group_key, post_keys
+from .deletion import reassign_posts
+from .models import Group, Post, PostCounter, User
+from .tasks import invalidate_group_author_feeds
+
+
+def post_feeds(author_id, group_id):
+    """Ленты, в которых показывается пост."""
+    feeds = [INDEX_FEED, author_feed(author_id)]
+    if group_id is not None:
+        feeds.append(group_feed(group_id))
+    return feeds
+
+
+@receiver(post_init, sender=Post)
+def remember_initial_post(sender, instance, **kwargs):
+    """Запоминаем автора и группу, чтобы заметить их смену при сохранении."""
+    instance._initial_author_id = instance.__dict__.get('author_id')
+    instance._initial_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Обновляет счетчики лент и инвалидирует ленты поста."""
+    initial_author_id = instance._initial_author_id
+    feeds = post_feeds(instance.author_id, instance.group_id)
+    keys = post_keys(instance.author_id, instance.group_id)
+    if created:
+        change_counts(keys, 1)
+    else:
+        initial_keys = post_keys(initial_author_id, instance._initial_group_id)
+        change_counts([key for key in initial_keys if key not in keys], -1)
+        change_counts([key for key in keys if key not in initial_keys], 1)
+        feeds += post_feeds(initial_author_id, instance._initial_group_id)
+    invalidate_feeds(*feeds)
+    instance._initial_author_id = instance.author_id
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_counts(post_keys(instance.author_id, instance.group_id), -1)
+    invalidate_feeds(*post_feeds(instance.author_id, instance.group_id))
+
+
+def group_dependent_feeds(group):
+    """
+    Ленты, где показываются ссылки на группу:
+    сама группа, главная и ленты авторов группы.
+    """
+    author_ids = Post.objects.filter(group=group).values_list(
+        'author_id', flat=True
+    ).distinct().order_by()
+    return [group_feed(group.pk), INDEX_FEED] + [
+        author_feed(author_id) for author_id in author_ids
+    ]
+
+
+@receiver(post_init, sender=Group)
+def remember_initial_group(sender, instance, **kwargs):
+    instance._initial_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def invalidate_saved_group(sender, instance, created, **kwargs):
+    invalidate_group_choices()
+    if created:
+        return
+    if instance._initial_slug == instance.slug:
+        invalidate_feeds(group_feed(instance.pk))
+    else:
+        invalidate_feeds(group_feed(instance.pk), INDEX_FEED)
+        invalidate_group_author_feeds.delay(instance.pk)
+    instance._initial_slug = instance.slug
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group(sender, instance, **kwargs):
+    # Посты теряют группу через SET_NULL без сигналов,
+    # поэтому ленты собираем до удаления.
+    invalidate_feeds(*group_dependent_feeds(instance))
+
+
+@receiver(post_delete, sender=Group)
+def forget_deleted_group(sender, instance, **kwargs):
+    invalidate_group_choices()
+    # Посты группы обнулены через SET_NULL без сигналов.
+    PostCounter.objects.filter(key=group_key(instance.pk)).delete()
+
+
+@receiver(pre_delete, sender=User)
+def reassign_deleted_author_posts(sender, instance, **kwargs):
+    """
+    Посты переходят anonymous до удаления при любом способе удаления
+    (shell, QuerySet.delete()): on_delete=SET обновляет их без сигналов,
+    и счетчики с лентами остались бы старыми. Удалить самого anonymous
+    reassign_posts не даст.
+    """
+    reassign_posts(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_author(sender, instance, **kwargs):
+    PostCounter.objects.filter(key=author_key(instance.pk)).delete()
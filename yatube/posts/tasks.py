@@ -0,0 +1,16 @@
+"""Фоновые задачи приложения posts (очередь core.tasks)."""
+from core.tasks import task
+from .cache import author_feed, invalidate_feeds
+from .models import Post
+
+
+@task
+def invalidate_group_author_feeds(group_id):
+    """
+    Ленты авторов, у которых есть посты группы: в них ссылки на группу.
+    Для большой группы выборка авторов долгая, поэтому идет в фоне.
+    """
+    author_ids = Post.objects.filter(group_id=group_id).values_list(
+        'author_id', flat=True
+    ).distinct().order_by()
+    invalidate_feeds(*(author_feed(author_id) for author_id in author_ids))
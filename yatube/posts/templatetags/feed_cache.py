@@ -0,0 +1,42 @@
+from django import template
+from django.core.cache import cache
+
+from posts.cache import FEED_CACHE_TIMEOUT, record_stat
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, key):
+        self.nodelist = nodelist
+        self.key = key
+
+    def render(self, context):
+        key = self.key.resolve(context)
+        if not key:
+            return self.nodelist.render(context)
+        fragment = cache.get(key)
+        if fragment is not None:
+            record_stat('hits')
+            return fragment
+        record_stat('misses')
+        fragment = self.nodelist.render(context)
+        cache.set(key, fragment, FEED_CACHE_TIMEOUT)
+        return fragment
+
+
+@register.tag
+def cachefeed(parser, token):
+    """
+    Кэширует фрагмент ленты по ключу из posts.cache.fragment_key:
+    {% cachefeed feed_cache_key %} ... {% endcachefeed %}
+    Пустой ключ отключает кэширование.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires exactly one argument."
+        )
+    nodelist = parser.parse(('endcachefeed',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,287 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+from posts.counters import author_post_count
+from posts.deletion import schedule_group_deletion
+from posts.models import Group, ImportCheckpoint, Post, User
+
+CALLS = []
+
+
+@tasks.task(max_attempts=2)
+def record_call(value):
+    CALLS.append(value)
+    if value == 'fail':
+        raise ValueError('не получилось')
+
+
+class SeedAndBenchmarkCommandsTest(TestCase):
+    def test_seed_data_is_reproducible(self):
+        """seed_data создает заданные объемы одинаково для одного seed."""
+        call_command(
+            'seed_data', users=5, groups=2, posts=30, batch_size=7,
+            seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(
+            User.objects.filter(username__startswith='seed_user_').count(), 5
+        )
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+        texts = list(Post.objects.order_by('pk').values_list('text'))
+        Post.objects.all().delete()
+        call_command(
+            'seed_data', users=5, groups=2, posts=30, batch_size=7,
+            seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text')), texts
+        )
+
+    def test_benchmark_reports_every_url(self):
+        """benchmark сохраняет перцентили и число запросов по каждому URL."""
+        call_command(
+            'seed_data', users=2, groups=1, posts=5, stdout=StringIO()
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'benchmark.json')
+            call_command(
+                'benchmark', requests=3, warmup=0, output=output,
+                user='seed_user_0', stdout=StringIO(), stderr=StringIO(),
+            )
+            with open(output) as report_file:
+                results = json.load(report_file)['results']
+        for name in ('posts:index', 'posts:post_detail', 'users:login',
+                     'about:tech'):
+            with self.subTest(name=name):
+                self.assertIn(name, results)
+                self.assertLessEqual(
+                    results[name]['p50_ms'], results[name]['p99_ms']
+                )
+        # Сессия и пользователь берутся из кэша, в базу ходят только ленты.
+        self.assertGreater(results['posts:index']['queries'], 0)
+        self.assertGreater(results['posts:post_detail']['queries'], 0)
+        # logout не замеряется: сессия --user жива до конца прогона.
+        self.assertNotIn('users:logout', results)
+        self.assertTrue(Session.objects.exists())
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='importer')
+        cls.group = Group.objects.create(
+            title='Группа', slug='import-group', description='Описание'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_jsonl(self, rows):
+        path = os.path.join(self.directory.name, 'posts.jsonl')
+        with open(path, 'w') as source:
+            for row in rows:
+                source.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def test_import_jsonl(self):
+        """Импорт сохраняет даты, пропускает неизвестных авторов."""
+        path = self.write_jsonl([
+            {'text': 'Старый пост', 'author': 'importer',
+             'group': 'import-group', 'pub_date': '2020-01-02T03:04:05Z'},
+            {'text': 'Без группы', 'author': 'importer'},
+            {'text': 'Чужой пост', 'author': 'unknown'},
+        ])
+        self.assertEqual(author_post_count(self.author), 0)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        old_post = Post.objects.get(text='Старый пост')
+        self.assertEqual(old_post.group, self.group)
+        self.assertEqual(old_post.pub_date.year, 2020)
+        self.assertEqual(author_post_count(self.author), 2)
+
+    def test_import_csv(self):
+        """CSV читается по заголовку с теми же полями."""
+        path = os.path.join(self.directory.name, 'posts.csv')
+        with open(path, 'w', newline='') as source:
+            writer = csv.DictWriter(source, ['text', 'author', 'group'])
+            writer.writeheader()
+            writer.writerow({'text': 'Пост,\nв две строки',
+                             'author': 'importer', 'group': ''})
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.get().text, 'Пост,\nв две строки')
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск продолжает с сохраненной позиции без дублей."""
+        path = self.write_jsonl(
+            {'text': f'Пост {i}', 'author': 'importer'} for i in range(5)
+        )
+        ImportCheckpoint.objects.create(
+            source=os.path.abspath(path), position=3, imported=3
+        )
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+
+class ExportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exporter')
+        cls.group = Group.objects.create(
+            title='Группа', slug='export-group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group if i % 2 else None,
+                 text=f'Пост {i}')
+            for i in range(25)
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.prefix = os.path.join(self.directory.name, 'posts')
+
+    def read_parts(self):
+        parts = sorted(os.listdir(self.directory.name))
+        rows = []
+        for part in parts:
+            with gzip.open(os.path.join(self.directory.name, part), 'rt') as f:
+                rows.append([json.loads(line) for line in f])
+        return rows
+
+    def test_export_in_parts(self):
+        """Выгрузка делится на части и идет по возрастанию даты."""
+        call_command(
+            'export_posts', self.prefix, chunk_size=4, part_size=10,
+            stdout=StringIO(),
+        )
+        parts = self.read_parts()
+        self.assertEqual([len(part) for part in parts], [10, 10, 5])
+        rows = sum(parts, [])
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('pub_date', 'pk')
+                 .values_list('pk', flat=True)),
+        )
+        self.assertEqual(rows[1]['author'], 'exporter')
+        self.assertEqual(rows[1]['group'], 'export-group')
+
+    def test_export_filters(self):
+        """Фильтр по группе оставляет только посты группы."""
+        call_command(
+            'export_posts', self.prefix, group='export-group',
+            stdout=StringIO(),
+        )
+        rows = sum(self.read_parts(), [])
+        self.assertEqual(len(rows), 12)
+        self.assertEqual({row['group'] for row in rows}, {'export-group'})
+
+    def test_export_then_import(self):
+        """Выгрузка читается командой import_posts."""
+        call_command('export_posts', self.prefix, stdout=StringIO())
+        Post.objects.all().delete()
+        call_command(
+            'import_posts', f'{self.prefix}-00001.jsonl.gz',
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 25)
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        CALLS.clear()
+
+    def run_workers(self):
+        out = StringIO()
+        call_command('run_workers', concurrency=1, burst=True, stdout=out)
+        return out.getvalue()
+
+    def test_identical_pending_tasks_are_deduplicated(self):
+        record_call.delay('a')
+        record_call.delay('a')
+        record_call.delay('b')
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertIn('Выполнено задач: 2', self.run_workers())
+        self.assertEqual(sorted(CALLS), ['a', 'b'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_with_backoff(self):
+        record_call.delay('fail')
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_workers()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+        self.assertIn('ValueError', task.last_error)
+        delay = (task.run_at - timezone.now()).total_seconds()
+        self.assertTrue(0 < delay <= tasks.retry_delay(1))
+        self.assertEqual(tasks.retry_delay(3), 4 * tasks.retry_delay(1))
+        # Следующая попытка — только после задержки.
+        self.run_workers()
+        self.assertEqual(CALLS, ['fail'])
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_workers()
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+
+    def test_expired_lease_is_claimed_again(self):
+        """Задачу упавшего воркера берет другой после истечения аренды."""
+        record_call.delay('a')
+        Task.objects.update(
+            status=Task.RUNNING, locked_until=timezone.now(), attempts=1,
+        )
+        self.run_workers()
+        self.assertEqual(CALLS, ['a'])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_tasks_run_at_once(self):
+        record_call.delay('a')
+        self.assertEqual(CALLS, ['a'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_group_deletion_runs_in_queue(self):
+        author = User.objects.create_user(username='member')
+        group = Group.objects.create(title='Группа', slug='queued')
+        Post.objects.create(author=author, group=group, text='Пост')
+        schedule_group_deletion(group)
+        self.assertEqual(Task.objects.count(), 2)
+        self.run_workers()
+        self.assertFalse(Group.objects.filter(slug='queued').exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_admin_shows_queue_depth_and_lag(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        record_call.delay('a')
+        Task.objects.update(
+            run_at=timezone.now() - datetime.timedelta(seconds=90)
+        )
+        response = self.client.get(reverse('admin:core_task_changelist'))
+        self.assertEqual(response.context['queue_stats']['ready'], 1)
+        self.assertGreaterEqual(response.context['queue_stats']['lag'], 90)
+        self.assertContains(response, 'Готовы к выполнению: 1')
+        self.assertContains(response, 'posts.test.test_commands.record_call')
@@ -1,6 +1,10 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from posts.forms import PostForm
 from posts.models import User, Group, Post
 
 
@@ -104,3 +108,87 @@ class PostURLTests(TestCase):
         edit_post = Post.objects.order_by('pub_date').first()
         # Проверим, изменение text произошло
         self.assertEquals(edit_post.text, form_data['text'])
+
+
+class GroupChoicesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Кот {i:02d}', slug=f'cat-{i}', description=''
+            ) for i in range(25)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def group_queries(self, method, *args):
+        with CaptureQueriesContext(connection) as queries:
+            method(*args)
+        return [
+            query['sql'] for query in queries
+            if 'FROM "posts_group"' in query['sql']
+        ]
+
+    def test_choices_are_cached(self):
+        """Список групп запрашивается один раз на все формы."""
+        url = reverse('posts:post_create')
+        self.assertEqual(
+            len(self.group_queries(self.authorized_client.get, url)), 1
+        )
+        self.assertEqual(
+            self.group_queries(self.authorized_client.get, url), []
+        )
+        choices = list(PostForm().fields['group'].choices)
+        self.assertEqual(len(choices), len(self.groups) + 1)
+        self.assertEqual(choices[1], (self.groups[0].pk, 'Кот 00'))
+
+    def test_group_changes_invalidate_choices(self):
+        """Сохранение и удаление группы сбрасывают кэш вариантов."""
+        list(PostForm().fields['group'].choices)
+        group = self.groups[0]
+        group.title = 'Пёс'
+        group.save()
+        self.assertIn((group.pk, 'Пёс'), PostForm().fields['group'].choices)
+        self.groups[1].delete()
+        self.assertNotIn(
+            self.groups[1].pk,
+            [pk for pk, _ in PostForm().fields['group'].choices],
+        )
+
+    def test_submitted_group_is_looked_up_by_pk(self):
+        """Выбранная группа проверяется поиском по первичному ключу."""
+        form = PostForm({'text': 'Текст', 'group': self.groups[3].pk})
+        queries = self.group_queries(form.is_valid)
+        self.assertTrue(form.is_valid())
+        # Поле формы (среди видимых групп) и проверка ForeignKey модели
+        # ищут группу по ключу.
+        self.assertTrue(queries)
+        lookup = f'"posts_group"."id" = {self.groups[3].pk}'
+        for query in queries:
+            self.assertIn(lookup, query)
+
+    def test_hidden_group_is_rejected(self):
+        """Группу в очереди на удаление выбрать нельзя."""
+        Group.objects.filter(pk=self.groups[3].pk).update(hidden=True)
+        form = PostForm({'text': 'Текст', 'group': self.groups[3].pk})
+        self.assertFalse(form.is_valid())
+        self.assertIn('group', form.errors)
+
+    def test_group_autocomplete_pages(self):
+        """Подсказки групп отдаются по страницам."""
+        url = reverse('posts:group_autocomplete')
+        first = self.client.get(url, {'q': 'кот'}).json()
+        self.assertEqual(len(first['results']), 20)
+        self.assertEqual(first['results'][0]['title'], 'Кот 00')
+        self.assertEqual(first['next_page'], 2)
+        second = self.client.get(url, {'q': 'кот', 'page': 2}).json()
+        self.assertEqual(
+            [group['title'] for group in second['results']],
+            [f'Кот {i}' for i in range(20, 25)],
+        )
+        self.assertIsNone(second['next_page'])
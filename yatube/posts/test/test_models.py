@@ -1,7 +1,23 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.cache import group_choices
+from posts.counters import (INDEX_KEY, author_key, author_post_count,
+                            group_key, group_post_count, index_post_count)
+from posts.deletion import (delete_author, run_group_deletion,
+                            schedule_group_deletion)
+from posts.fields import make_excerpt
+from posts.models import (SENTINEL_CACHE_KEY, SENTINEL_USERNAME, Group,
+                          GroupDeletion, Post, PostCounter, sentinel_user_id)
 
 User = get_user_model()
 
@@ -65,3 +81,297 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value
                 )
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.other_author = User.objects.create_user(username='other_author')
+        Post.objects.create(author=cls.author, text='Первый пост')
+
+    def test_counter_follows_post_writes(self):
+        """Счетчик меняется при создании, удалении и смене автора поста."""
+        self.assertEqual(author_post_count(self.author), 1)
+        post = Post.objects.create(author=self.author, text='Второй пост')
+        self.assertEqual(author_post_count(self.author), 2)
+        self.assertEqual(author_post_count(self.other_author), 0)
+
+        post = Post.objects.get(pk=post.pk)
+        post.author = self.other_author
+        post.save()
+        self.assertEqual(author_post_count(self.author), 1)
+        self.assertEqual(author_post_count(self.other_author), 1)
+
+        post.delete()
+        self.assertEqual(author_post_count(self.other_author), 0)
+
+    def test_feed_counters_follow_group_changes(self):
+        """Счетчики всех постов и групп следуют за записью и группой."""
+        group = Group.objects.create(title='Группа', slug='counted')
+        other_group = Group.objects.create(title='Другая', slug='other')
+        self.assertEqual(index_post_count(), 1)
+        self.assertEqual(group_post_count(group), 0)
+        self.assertEqual(group_post_count(other_group), 0)
+        post = Post.objects.create(
+            author=self.author, group=group, text='В группе'
+        )
+        self.assertEqual(index_post_count(), 2)
+        self.assertEqual(group_post_count(group), 1)
+        post.group = other_group
+        post.save()
+        self.assertEqual(group_post_count(group), 0)
+        self.assertEqual(group_post_count(other_group), 1)
+        self.assertEqual(index_post_count(), 2)
+        other_group_key = group_key(other_group.pk)
+        other_group.delete()
+        self.assertFalse(
+            PostCounter.objects.filter(key=other_group_key).exists()
+        )
+        post.delete()
+        self.assertEqual(index_post_count(), 1)
+
+    def test_recount_fixes_drifted_counters(self):
+        """Команда recount_posts исправляет разошедшиеся счетчики."""
+        author_post_count(self.author)
+        index_post_count()
+        PostCounter.objects.filter(
+            key__in=[author_key(self.author.pk), INDEX_KEY]
+        ).update(value=42)
+        call_command('recount_posts', batch_size=1, stdout=StringIO())
+        self.assertEqual(author_post_count(self.author), 1)
+        self.assertEqual(index_post_count(), Post.objects.count())
+        other_counter = PostCounter.objects.get(
+            key=author_key(self.other_author.pk)
+        )
+        self.assertEqual(other_counter.value, 0)
+
+
+class DeleteAuthorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='prolific')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='',
+        )
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {i}')
+            for i in range(7)
+        )
+        author_post_count(self.author)
+
+    def test_delete_author_moves_posts_in_batches(self):
+        """Посты переходят anonymous, счетчики следуют за ними."""
+        self.assertEqual(delete_author(self.author, batch_size=3), 7)
+        self.assertFalse(User.objects.filter(username='prolific').exists())
+        sentinel = User.objects.get(username=SENTINEL_USERNAME)
+        self.assertEqual(Post.objects.filter(author=sentinel).count(), 7)
+        self.assertEqual(author_post_count(sentinel), 7)
+        self.assertFalse(
+            PostCounter.objects.filter(key=author_key(self.author.pk))
+            .exists()
+        )
+
+    def test_plain_delete_uses_sentinel(self):
+        """
+        Обычный delete() и QuerySet.delete() тоже отдают посты anonymous,
+        вместе со счетчиками и лентами.
+        """
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Пост другого автора')
+        profile = reverse(
+            'posts:profile', kwargs={'username': SENTINEL_USERNAME}
+        )
+        self.author.delete()
+        sentinel = User.objects.get(username=SENTINEL_USERNAME)
+        self.assertEqual(author_post_count(sentinel), 7)
+        self.assertContains(self.client.get(profile), 'Пост 6')
+        User.objects.filter(pk=other.pk).delete()
+        self.assertEqual(Post.objects.filter(author=sentinel).count(), 8)
+        self.assertEqual(author_post_count(sentinel), 8)
+        self.assertContains(self.client.get(profile), 'Пост другого автора')
+        self.assertFalse(
+            PostCounter.objects.filter(key=author_key(self.author.pk))
+            .exists()
+        )
+        with self.assertRaises(ValueError), transaction.atomic():
+            sentinel.delete()
+        self.assertEqual(Post.objects.filter(author=sentinel).count(), 8)
+
+    def test_sentinel_is_not_deleted(self):
+        """anonymous не удаляется: его посты переносить некуда."""
+        delete_author(self.author)
+        sentinel = User.objects.get(username=SENTINEL_USERNAME)
+        with self.assertRaises(ValueError):
+            delete_author(sentinel)
+        self.assertTrue(User.objects.filter(pk=sentinel.pk).exists())
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[sentinel.pk])
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Post.objects.filter(author=sentinel).count(), 7)
+
+    def test_rolled_back_sentinel_is_not_cached(self):
+        """id отмененного создания anonymous не остается в кэше."""
+        with transaction.atomic():
+            sentinel_user_id()
+            transaction.set_rollback(True)
+        self.assertIsNone(cache.get(SENTINEL_CACHE_KEY))
+        user = User.objects.create_user(username='newcomer')
+        Post.objects.create(author=user, text='Пост новичка')
+        self.assertEqual(delete_author(user), 1)
+        sentinel = User.objects.get(username=SENTINEL_USERNAME)
+        self.assertNotEqual(sentinel.pk, user.pk)
+        self.assertEqual(Post.objects.filter(author=sentinel).count(), 1)
+
+    def test_admin_delete_confirmation_skips_posts(self):
+        """Страница подтверждения не загружает посты автора."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'prolific')
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "posts_post"' in query['sql']
+        ])
+
+    def test_admin_delete_moves_posts(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            Post.objects.filter(author__username=SENTINEL_USERNAME).count(), 7
+        )
+
+
+class GroupDeletionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='member')
+        self.group = Group.objects.create(
+            title='Большая группа', slug='big', description='',
+        )
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {i}')
+            for i in range(7)
+        )
+
+    def test_scheduled_group_is_hidden_at_once(self):
+        job = schedule_group_deletion(self.group)
+        self.assertEqual(job.total, 7)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 7)
+        self.assertNotIn(self.group.pk, dict(group_choices()))
+        response = self.client.get(
+            reverse('posts:group_post', kwargs={'slug': 'big'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), '/group/big/'
+        )
+
+    def test_deletion_resumes_from_remaining_posts(self):
+        """Прерванное задание доделывает оставшиеся посты."""
+        job = schedule_group_deletion(self.group)
+        # Как будто первая пачка прошла, а потом процесс упал.
+        Post.objects.filter(
+            pk__in=Post.objects.order_by('pk').values('pk')[:3]
+        ).update(group=None)
+        GroupDeletion.objects.filter(pk=job.pk).update(processed=3)
+        out = StringIO()
+        call_command('delete_groups', batch_size=2, stdout=out)
+        job.refresh_from_db()
+        self.assertEqual(job.processed, 7)
+        self.assertEqual(job.percent, 100)
+        self.assertIsNotNone(job.finished)
+        self.assertIsNone(job.group)
+        self.assertFalse(Group.objects.filter(slug='big').exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 7)
+        self.assertIn('отвязано постов: 7', out.getvalue())
+
+    def test_rerun_does_not_count_detached_posts_twice(self):
+        """Посты, уже отвязанные другим воркером, не считаются снова."""
+        job = schedule_group_deletion(self.group)
+        update = QuerySet.update
+
+        def racing_update(queryset, **kwargs):
+            if kwargs == {'group': None}:
+                # Ту же пачку только что отвязал другой воркер.
+                update(queryset, **kwargs)
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            run_group_deletion(job, batch_size=3)
+        job.refresh_from_db()
+        self.assertEqual(job.processed, 0)
+        self.assertEqual(Post.objects.filter(group=None).count(), 7)
+
+    def test_admin_delete_only_schedules(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:posts_group_delete', args=[self.group.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.group.refresh_from_db()
+        self.assertTrue(self.group.hidden)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 7)
+        job = GroupDeletion.objects.get()
+        response = self.client.get(
+            reverse('admin:posts_groupdeletion_changelist')
+        )
+        self.assertContains(response, '0% (0 из 7)')
+        run_group_deletion(job, batch_size=5)
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+
+
+class ExcerptFieldTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+
+    def test_excerpt_follows_text(self):
+        """Начало текста и длина пересчитываются при save и bulk_create."""
+        long_text = 'слово ' * 100
+        post = Post.objects.create(author=self.author, text='Короткий')
+        self.assertEqual((post.excerpt, post.text_length), ('Короткий', 8))
+        self.assertFalse(post.is_truncated)
+        post.text = long_text
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_length, len(long_text))
+        self.assertTrue(post.is_truncated)
+        self.assertTrue(post.excerpt.endswith('слово…'))
+        self.assertLessEqual(len(post.excerpt), 300)
+        Post.objects.bulk_create([Post(author=self.author, text=long_text)])
+        created = Post.objects.latest('pk')
+        self.assertEqual(created.excerpt, post.excerpt)
+        self.assertEqual(str(created), long_text[:15])
+
+    def test_unsaved_post_str_uses_text(self):
+        """У несохраненного поста str берется из текста."""
+        post = Post(author=self.author, text='Несохраненный пост')
+        self.assertEqual(str(post), 'Несохраненный п')
+        saved = Post.objects.create(author=self.author, text=post.text)
+        deferred = Post.objects.defer('text').get(pk=saved.pk)
+        self.assertEqual(str(deferred), 'Несохраненный п')
+
+    def test_make_excerpt_cuts_long_words(self):
+        """Без пробела во второй половине обрезается посреди слова."""
+        self.assertEqual(make_excerpt('а' * 20, 10), 'а' * 9 + '…')
+        self.assertEqual(make_excerpt('ab cdefghijkl', 10), 'ab cdefgh…')
+        self.assertEqual(make_excerpt('abcdef ghijkl', 10), 'abcdef…')
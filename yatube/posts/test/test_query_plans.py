@@ -0,0 +1,116 @@
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from posts.models import Group, Post
+from posts.paginators import CURSOR_NEXT, CURSOR_PREVIOUS, encode_cursor
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN для SQLite')
+class PostQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='Group description',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Текст поста {i}')
+            for i in range(25)
+        )
+        cls.post = Post.objects.all()[12]
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_views_use_feed_indexes(self):
+        """
+        Каждое представление читает посты диапазоном по индексу
+        и не сортирует выборку отдельным шагом (USE TEMP B-TREE).
+        """
+        next_cursor = encode_cursor(self.post, CURSOR_NEXT)
+        previous_cursor = encode_cursor(self.post, CURSOR_PREVIOUS)
+        feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_post', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_create'),
+        ]
+        for feed in feeds:
+            urls += [
+                feed,
+                f'{feed}?page=2',
+                f'{feed}?cursor={next_cursor}',
+                f'{feed}?cursor={previous_cursor}',
+            ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries:
+                sql = query['sql']
+                if 'FROM "posts_post"' not in sql:
+                    continue
+                plan = self.explain(sql)
+                with self.subTest(url=url, sql=sql, plan=plan):
+                    self.assertFalse(
+                        any('TEMP B-TREE' in step for step in plan)
+                    )
+                    for step in plan:
+                        if 'posts_post' in step:
+                            self.assertRegex(step, 'INDEX|PRIMARY KEY')
+
+
+class SqliteProfileTests(SimpleTestCase):
+    def test_new_connection_pragmas(self):
+        """Каждое соединение включает WAL и заданные PRAGMA."""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': os.path.join(directory, 'db.sqlite3'),
+                'PRAGMAS': {'busy_timeout': 1234},
+                'OPTIONS': {},
+                'TIME_ZONE': None,
+                'CONN_MAX_AGE': 0,
+                'AUTOCOMMIT': True,
+                'ATOMIC_REQUESTS': False,
+                'USER': '',
+                'PASSWORD': '',
+                'HOST': '',
+                'PORT': '',
+            })
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    names = ('journal_mode', 'synchronous', 'busy_timeout')
+                    for name in names:
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        # synchronous=NORMAL хранится как 1.
+        self.assertEqual(
+            pragmas,
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234},
+        )
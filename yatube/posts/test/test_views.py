@@ -1,11 +1,34 @@
+import base64
+import gzip
+import json
+import os
+import re
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.paginator import Paginator
 from django import forms
+from django.db import connection, connections
 from django.shortcuts import get_object_or_404
-from django.test import Client, TestCase
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Group, Post
+from core import metrics
+from core.db import routers
+from core.decorators import QueryBudgetExceeded, query_budget
+from core.middleware.replica import STICKY_COOKIE
+from posts import paginators
+from posts.cache import feed_cache_stats
+from posts.models import Group, Post, PostCounter
+from posts.views import index
+from users.backends import user_cache_key
 
 POSTS_COUNT = 10
 POSTS_COUNT_MAX = 13
@@ -53,6 +76,8 @@ class TaskPagesTests(TestCase):
         )
 
     def setUp(self):
+        # Кэш лент не переживает тест
+        cache.clear()
         # Подготовка неавторизованного клиента
         self.guest_client = Client()
         # Авторизация от автора тестовых постов
@@ -211,3 +236,887 @@ class TaskPagesTests(TestCase):
         )
         count_posts_group02 = len(response.context['page_obj'].object_list)
         self.assertEqual(count_posts_group02, 0)
+
+    def test_cursor_pages_cover_feed(self):
+        """
+        Навигация по курсору проходит всю ленту без пропусков и повторов,
+        ссылка назад возвращает на предыдущую страницу.
+        """
+        for reverse_name in self.reverse_test_paginator:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.client.get(reverse_name, {'cursor': ''})
+                first_page = response.context['page_obj']
+                self.assertEqual(len(first_page), POSTS_COUNT)
+                self.assertFalse(first_page.has_previous())
+                response = self.client.get(
+                    reverse_name, {'cursor': first_page.next_cursor()}
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(
+                    len(second_page), POSTS_COUNT_MAX - POSTS_COUNT
+                )
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    list(first_page) + list(second_page),
+                    list(Post.objects.order_by('-pub_date', '-pk')),
+                )
+                response = self.client.get(
+                    reverse_name, {'cursor': second_page.previous_cursor()}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page)
+                )
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу ленты."""
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_COUNT)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_cursor_beyond_feed_shows_first_page(self):
+        """
+        Курсор за последним постом или перед самым новым
+        (устаревшая ссылка) открывает первую страницу.
+        """
+        for raw in (
+            'n|2000-01-01T00:00:00+00:00|1',
+            'p|2100-01-01T00:00:00+00:00|1',
+        ):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            with self.subTest(cursor=raw):
+                response = self.client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POSTS_COUNT)
+                self.assertFalse(page_obj.has_previous())
+                self.assertIsNotNone(page_obj.next_cursor())
+
+    def test_empty_cursor_page_has_no_cursors(self):
+        page = paginators.CursorPage([], None, True, True)
+        self.assertIsNone(page.next_cursor())
+        self.assertIsNone(page.previous_cursor())
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_feeds_fit_query_budget(self):
+        """
+        Ленты и страница поста укладываются в бюджет запросов:
+        автор и группа загружаются вместе с постами, без N+1.
+        """
+        urls = self.reverse_test_paginator + (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for reverse_name in urls:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(reverse_name)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_cold_feeds_fit_query_budget(self):
+        """
+        Первый запрос авторизованного пользователя к ленте без строки
+        счетчика и с холодным кэшем сессии тоже укладывается в бюджет.
+        """
+        urls = self.reverse_test_paginator + (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for reverse_name in urls:
+            with self.subTest(reverse_name=reverse_name):
+                PostCounter.objects.all().delete()
+                cache.clear()
+                response = self.authorized_client.get(reverse_name)
+                self.assertEqual(response.status_code, 200)
+
+    def test_page_links_are_windowed(self):
+        """Навигация показывает окно страниц и края, а не все страницы."""
+        paginator = paginators.FeedPaginator(
+            Post.objects.all(), 1, count=100
+        )
+        ellipsis = paginator.ELLIPSIS
+        self.assertEqual(
+            paginator.get_page(50).page_window,
+            [1, 2, ellipsis, 47, 48, 49, 50, 51, 52, 53, ellipsis, 99, 100],
+        )
+        self.assertEqual(
+            paginator.get_page(2).page_window,
+            [1, 2, 3, 4, 5, ellipsis, 99, 100],
+        )
+        with mock.patch.object(paginators, 'POSTS_COUNT', 1):
+            response = self.client.get(reverse('posts:index'), {'page': 6})
+        self.assertEqual(response.context['page_obj'].number, 6)
+        self.assertContains(response, 'class="page-link">…', count=1)
+        self.assertContains(response, 'href="?page=13"')
+        self.assertNotContains(response, 'href="?page=10"')
+
+    def test_feed_count_comes_from_counter(self):
+        """Число постов ленты читается из счетчика без COUNT(*)."""
+        self.client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            Post.objects.count(),
+        )
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(*)', query['sql'])
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_query_budget_raises_when_exceeded(self):
+        """Превышение бюджета запросов выбрасывает исключение."""
+        request = RequestFactory().get(reverse('posts:index'))
+        request.user = AnonymousUser()
+        with self.assertRaises(QueryBudgetExceeded):
+            query_budget(0)(index)(request)
+
+    def test_query_budget_counts_other_databases(self):
+        """Запросы к реплике тоже расходуют бюджет."""
+        alias = 'budget_replica'
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:',
+        }
+
+        def forget_alias():
+            connections[alias].close()
+            delattr(connections._connections, alias)
+            del connections.databases[alias]
+
+        self.addCleanup(forget_alias)
+
+        def replica_view(request):
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return None
+
+        request = RequestFactory().get('/')
+        query_budget(1)(replica_view)(request)
+        with self.assertRaises(QueryBudgetExceeded):
+            query_budget(0)(replica_view)(request)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='Group description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Закэшированный пост',
+        )
+        cls.feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_post', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertFeedsContain(self, text, contains=True):
+        for url in self.feeds:
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertEqual(text in content, contains)
+
+    def test_feed_fragment_served_from_cache(self):
+        """Повторный показ ленты берет список постов из кэша."""
+        self.client.get(reverse('posts:index'))
+        before = feed_cache_stats()
+        Post.objects.filter(pk=self.post.pk).update(text='Изменено в обход')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Закэшированный пост')
+        self.assertEqual(feed_cache_stats()['hits'], before['hits'] + 1)
+
+    def test_invalid_cursors_share_first_page_fragment(self):
+        """
+        Испорченные и устаревшие курсоры не заводят новых ключей кэша:
+        их страница — первая, и берется из кэша первой страницы.
+        """
+        url = reverse('posts:index')
+        self.client.get(url)
+        stale = base64.urlsafe_b64encode(
+            b'n|2000-01-01T00:00:00+00:00|1'
+        ).decode().rstrip('=')
+        before = feed_cache_stats()
+        for cursor in ('garbage', 'garbage2', stale):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertContains(response, 'Закэшированный пост')
+        after = feed_cache_stats()
+        self.assertEqual(after['hits'], before['hits'] + 3)
+        self.assertEqual(after['misses'], before['misses'])
+
+    def test_post_create_invalidates_feeds(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        self.assertFeedsContain('Новый пост', contains=False)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.pk},
+        )
+        self.assertFeedsContain('Новый пост')
+
+    def test_post_edit_invalidates_feeds(self):
+        """Правка поста через post_edit видна во всех лентах."""
+        self.assertFeedsContain('Закэшированный пост')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        self.assertFeedsContain('Исправленный пост')
+
+    def test_post_delete_invalidates_feeds(self):
+        """Удаленный пост пропадает из лент."""
+        self.assertFeedsContain('Закэшированный пост')
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertFeedsContain('Закэшированный пост', contains=False)
+
+    def test_group_slug_change_invalidates_feeds(self):
+        """Смена slug группы обновляет ссылки на нее в лентах."""
+        index = reverse('posts:index')
+        self.client.get(index)
+        self.group.slug = 'new_slug'
+        self.group.save()
+        self.assertContains(self.client.get(index), '/group/new_slug/')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='Group description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_post', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Повтор запроса с ETag неизмененной страницы дает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_post_edit_changes_validators(self):
+        """После правки поста страницы отдаются заново."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_last_modified(self):
+        """Last-Modified страницы поста не раньше его правки."""
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk},
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        url = reverse('posts:index')
+        self.assertNotEqual(
+            self.client.get(url)['ETag'],
+            self.authorized_client.get(url)['ETag'],
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Индекс FTS5 есть только у SQLite')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Кот номер {i}')
+            for i in range(POSTS_COUNT_MAX)
+        )
+        cls.best_match = Post.objects.create(
+            author=cls.user, text='Кот, кот и еще раз кот'
+        )
+        Post.objects.create(author=cls.user, text='Собака')
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        ).context['page_obj']
+
+    def test_search_ranks_and_pages_results(self):
+        """
+        Поиск находит все посты по слову, самый релевантный первым,
+        и листается по курсору.
+        """
+        first_page = self.search('КОТ')
+        self.assertEqual(first_page.object_list[0], self.best_match)
+        self.assertEqual(len(first_page), POSTS_COUNT)
+        second_page = self.search('кот', cursor=first_page.next_cursor())
+        self.assertFalse(second_page.has_next())
+        found = set(first_page.object_list + second_page.object_list)
+        self.assertEqual(found, set(Post.objects.filter(text__contains='от')))
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(text='Собака')
+        post.text = 'Попугай'
+        post.save()
+        self.assertEqual(len(self.search('Собака')), 0)
+        self.assertEqual(list(self.search('попугай')), [post])
+        post.delete()
+        self.assertEqual(len(self.search('попугай')), 0)
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы FTS5 в запросе не приводят к ошибке."""
+        self.assertEqual(len(self.search('"кот"* ^(')), POSTS_COUNT)
+
+    def test_rebuild_search_index(self):
+        """Команда rebuild_search_index заново индексирует все посты."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) "
+                "VALUES ('delete-all')"
+            )
+        self.assertEqual(len(self.search('Собака')), 0)
+        call_command('rebuild_search_index', chunk_size=5, stdout=StringIO())
+        self.assertEqual(len(self.search('Собака')), 1)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по индексу."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class PostFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(
+            title='test_group',
+            slug='test_slug',
+            description='Group description',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Текст поста {i}')
+            for i in range(POSTS_COUNT_MAX)
+        )
+        cls.feeds = (
+            reverse('posts:latest_feed'),
+            reverse('posts:group_feed', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile_feed', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_content(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_rss_feed(self):
+        """RSS отдает не больше ?limit= постов, новые первыми."""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                root = ElementTree.fromstring(
+                    self.get_content(url, limit=POSTS_COUNT)
+                )
+                titles = [
+                    item.find('description').text
+                    for item in root.iter('item')
+                ]
+                self.assertEqual(titles, [
+                    post.text for post in Post.objects.all()[:POSTS_COUNT]
+                ])
+
+    def test_atom_and_json_feeds(self):
+        """Atom и JSON Feed содержат все посты ленты."""
+        atom = ElementTree.fromstring(
+            self.get_content(self.feeds[0], format='atom')
+        )
+        entries = atom.findall('{http://www.w3.org/2005/Atom}entry')
+        self.assertEqual(len(entries), POSTS_COUNT_MAX)
+        feed = json.loads(self.get_content(self.feeds[0], format='json'))
+        self.assertEqual(len(feed['items']), POSTS_COUNT_MAX)
+        self.assertEqual(feed['items'][0]['tags'], [self.group.slug])
+
+    def test_feed_conditional_get(self):
+        """Неизмененная лента отдает 304 по ETag."""
+        response = self.client.get(self.feeds[1])
+        response = self.client.get(
+            self.feeds[1], HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_feed_format(self):
+        """Неизвестный формат ленты дает 404."""
+        response = self.client.get(self.feeds[0], {'format': 'csv'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(REPLICA_DATABASES=['default'])
+class ReplicaRoutingTests(TestCase):
+    """
+    Реплика в тестах — та же база 'default',
+    поэтому проверяем, выбирал ли роутер реплику.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.post = Post.objects.create(author=cls.user, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def routed_to_replica(self, client, url):
+        with mock.patch.object(
+            routers.random, 'choice', return_value='default'
+        ) as choice:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return choice.called
+
+    def test_read_views_use_replica(self):
+        """Страницы из REPLICA_VIEWS читают с реплики."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                self.assertTrue(
+                    self.routed_to_replica(self.authorized_client, url)
+                )
+
+    def test_other_views_use_primary(self):
+        """Формы и прочие страницы читают с основной базы."""
+        for url in (reverse('posts:post_create'), reverse('posts:search')):
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.routed_to_replica(self.authorized_client, url)
+                )
+
+    def test_read_your_writes(self):
+        """После записи клиент какое-то время читает с основной базы."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertFalse(self.routed_to_replica(
+            self.authorized_client, reverse('posts:index')
+        ))
+        self.authorized_client.cookies[STICKY_COOKIE] = '0'
+        self.assertTrue(self.routed_to_replica(
+            self.authorized_client, reverse('posts:index')
+        ))
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'slug-{i}', description=''
+            ) for i in range(3)
+        ]
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(
+                author=self.admin,
+                group=self.groups[i % len(self.groups)],
+                text=f'Текст поста {i}',
+            ) for i in range(count)
+        )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        """Авторы, группы и список групп не запрашиваются на каждую строку."""
+        self.create_posts(2)
+        # Первый запрос заполняет кэш списка групп.
+        self.changelist_queries()
+        few_rows = self.changelist_queries()
+        self.create_posts(40)
+        self.assertEqual(self.changelist_queries(), few_rows)
+
+    def test_estimated_count_above_threshold(self):
+        """Выше порога число строк берется из оценки, а не COUNT(*)."""
+        self.create_posts(30)
+        Post.objects.filter(
+            pk__in=Post.objects.order_by('pk')[:2]
+        ).delete()
+        with mock.patch.object(paginators, 'ESTIMATED_COUNT_THRESHOLD', 5):
+            response = self.client.get(self.url)
+            self.assertEqual(response.context['cl'].result_count, 30)
+            # С фильтром строки считаются только до порога.
+            response = self.client.get(
+                self.url, {'group__id__exact': self.groups[0].pk}
+            )
+            self.assertEqual(response.context['cl'].result_count, 6)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 28)
+
+    def test_changelist_does_not_load_text(self):
+        self.create_posts(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Текст поста 2')
+        for query in queries.captured_queries:
+            self.assertNotIn('"posts_post"."text"', query['sql'])
+
+
+class ExcerptTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='writer')
+        cls.group = Group.objects.create(
+            title='Группа', slug='excerpt-group', description='',
+        )
+        cls.text = 'слово ' * 200 + 'хвост'
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text=cls.text,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_render_excerpt_without_text(self):
+        """Ленты не загружают полный текст и ссылаются на пост."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_post', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:search') + '?q=слово',
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, self.post.excerpt)
+                self.assertNotContains(response, 'хвост')
+                self.assertContains(response, reverse(
+                    'posts:post_detail', kwargs={'post_id': self.post.pk}
+                ))
+                for query in queries.captured_queries:
+                    self.assertNotIn('"posts_post"."text"', query['sql'])
+
+    def test_post_detail_renders_full_text(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, 'хвост')
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.post = Post.objects.create(author=cls.user, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header_and_log(self):
+        """Ответ содержит Server-Timing, а лог — имя представления."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        with self.assertLogs('core.middleware.timing', 'INFO') as logs:
+            response = self.client.get(url)
+        metrics = [
+            metric.split(';')[0]
+            for metric in response['Server-Timing'].split(', ')
+        ]
+        self.assertEqual(metrics, ['db', 'tpl', 'view', 'total'])
+        self.assertIn('view=posts:post_detail', logs.output[0])
+        fields = logs.records[0].timing
+        self.assertEqual(fields['status'], 200)
+        self.assertGreater(fields['db_queries'], 0)
+        self.assertGreater(fields['template_ms'], 0)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    INDEX_REQUESTS = (
+        'yatube_requests_total{view="posts:index",method="GET",status="200"}'
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    def metric(self, name):
+        """Значение строки метрики или 0, если строки нет."""
+        content = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        for line in content.splitlines():
+            if line.startswith(name + ' '):
+                return float(line.split()[-1])
+        return 0
+
+    def test_metrics_count_requests_per_view(self):
+        """Запросы считаются по имени URL, с гистограммами."""
+        before = self.metric(self.INDEX_REQUESTS)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.metric(self.INDEX_REQUESTS), before + 2)
+        self.assertGreaterEqual(self.metric(
+            'yatube_request_duration_seconds_count{view="posts:index"}'
+        ), 2)
+        self.assertGreaterEqual(self.metric(
+            'yatube_response_size_bytes_bucket{view="posts:index",le="+Inf"}'
+        ), 2)
+
+    def test_metrics_aggregate_worker_files(self):
+        """Файлы метрик других воркеров складываются с текущим."""
+        self.client.get(reverse('posts:index'))
+        with tempfile.TemporaryDirectory() as directory:
+            other = {
+                'requests': {'posts:index|GET|200': 5},
+                'histograms': {
+                    'yatube_request_duration_seconds': {},
+                    'yatube_request_db_queries': {},
+                    'yatube_response_size_bytes': {},
+                },
+            }
+            with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+                json.dump(other, f)
+            with self.settings(METRICS_DIR=directory):
+                own = metrics.registry.requests['posts:index|GET|200']
+                self.assertEqual(self.metric(self.INDEX_REQUESTS), own + 5)
+                self.assertTrue(os.path.exists(os.path.join(
+                    directory,
+                    f'metrics-{metrics.registry.file_id}.json',
+                )))
+
+    def test_metrics_show_feed_cache_stats(self):
+        """Счетчики кэша лент веб-процесса видны на /metrics."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.metric('yatube_feed_cache_misses'), 1)
+        self.assertEqual(self.metric('yatube_feed_cache_hits'), 1)
+        self.assertEqual(self.metric('yatube_feed_cache_hit_ratio'), 0.5)
+
+    def test_metrics_file_is_unique_per_process(self):
+        """Процесс с повторно выданным pid пишет в новый файл."""
+        first = metrics.registry.file_id
+        metrics.registry.reset()
+        self.assertTrue(first.startswith(f'{os.getpid()}-'))
+        self.assertNotEqual(metrics.registry.file_id, first)
+
+    def test_metrics_for_staff_or_token_only(self):
+        """
+        Без staff и токена метрики закрыты, в том числе для 127.0.0.1
+        (так выглядят все запросы за прокси).
+        """
+        url = reverse('metrics')
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403
+        )
+        self.assertEqual(self.client.get(
+            url, HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code, 403)
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer None'
+            ).status_code, 403)
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_author')
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(PROFILE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory.name
+        self.url = reverse('posts:profile', kwargs={'username': self.user})
+
+    def test_staff_request_is_profiled(self):
+        """Профиль с SQL сохраняется и виден на странице staff."""
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(sorted(os.listdir(self.directory)), [
+            f'{profile_id}.json', f'{profile_id}.prof',
+        ])
+        response = self.client.get(reverse('core:profiles'))
+        profile = response.context['profiles'][0]
+        self.assertEqual(profile['view'], 'posts:profile')
+        self.assertGreater(profile['query_count'], 0)
+        response = self.client.get(
+            reverse('core:profile_detail', args=[profile_id])
+        )
+        profile = response.context['profile']
+        self.assertIn('Ordered by: cumulative time', profile['stats'])
+        self.assertTrue(any(
+            'posts_post' in query['sql'] for query in profile['queries']
+        ))
+
+    def test_only_staff_can_profile(self):
+        """Запросы остальных пользователей не профилируются."""
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'_profile': 1})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+        response = self.client.get(reverse('core:profiles'))
+        self.assertEqual(response.status_code, 302)
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        with override_settings(STATIC_ROOT=cls.static_root.name):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.static_root.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        settings = self.settings(STATIC_ROOT=self.static_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def stylesheet_url(self):
+        content = self.client.get(reverse('about:tech')).content.decode()
+        return re.search(r'href="(/static/css/[^"]+)"', content).group(1)
+
+    def test_hashed_url_is_immutable_and_precompressed(self):
+        """Статика с хэшем в имени кэшируется навсегда и отдается сжатой."""
+        url = self.stylesheet_url()
+        self.assertRegex(url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.startswith(b'@charset'))
+
+        response = self.client.get(url)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_favicon_is_served_without_redirect(self):
+        response = self.client.get('/favicon.ico')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+
+class CachedAuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user('test_author', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_cached_authenticated_view_has_no_queries(self):
+        """Сессия и пользователь берутся из кэша без запросов к БД."""
+        self.authorized_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_logout_invalidates_cached_user(self):
+        self.authorized_client.get(self.url)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_password_change_ends_sessions(self):
+        """После смены пароля старая сессия больше не авторизует."""
+        self.authorized_client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-pass')
+        user.save()
+        response = self.authorized_client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
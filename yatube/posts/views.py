@@ -1,67 +1,92 @@
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 
+from core.decorators import query_budget
+from .cache import (INDEX_FEED, author_feed, fragment_key, group_choices,
+                    group_feed)
+from .conditional import (condition_on_feeds, group_validators,
+                          index_validators, post_detail_validators,
+                          profile_validators)
+from .counters import author_post_count, group_post_count, index_post_count
+from .feeds import feed_response
 from .models import Group, Post, User
 from .forms import PostForm
+from .paginators import GROUPS_COUNT, POSTS_COUNT, get_page_obj
+from .search import search_posts
 
-POSTS_COUNT = 10
 User = get_user_model()
 
 
+# Ленты показывают post.excerpt, полный текст загружает только post_detail.
+# Бюджеты запросов учитывают сессию и пользователя авторизованного клиента
+# при холодном кэше, поиск объекта для валидатора условного GET и чтение
+# счетчика постов, которого еще нет (SELECT, COUNT, BEGIN, INSERT);
+# они не должны зависеть от числа постов на странице.
+@query_budget(7)
+@condition_on_feeds(index_validators)
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    paginator = Paginator(posts, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.select_related('author', 'group').defer('text')
+    page_obj = get_page_obj(request, posts, index_post_count())
     context = {
         'page_obj': page_obj,
+        'feed_cache_key': fragment_key(request, INDEX_FEED, page_obj),
     }
     return render(request, template, context)
 
 
+@query_budget(9)
+@condition_on_feeds(group_validators)
 def group_posts(request, slug):
     """
     Функция для отображения групп.
     Фильтр только опубликованых постов.
     """
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_number = request.GET.get('page')
-    paginator = Paginator(posts, POSTS_COUNT)
-    page_obj = paginator.get_page(page_number)
+    group = get_object_or_404(Group, slug=slug, hidden=False)
+    posts = group.posts.select_related('author').defer('text')
+    page_obj = get_page_obj(request, posts, group_post_count(group))
     context = {
         'group': group,
-        'posts': posts,
         'page_obj': page_obj,
+        'feed_cache_key': fragment_key(
+            request, group_feed(group.pk), page_obj
+        ),
     }
     return render(request, template, context)
 
 
+@query_budget(9)
+@condition_on_feeds(profile_validators)
 def profile(request, username):
     template = 'posts/profile.html'
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = user.posts.select_related('group').defer('text')
+    post_count = author_post_count(user)
+    page_obj = get_page_obj(request, post_list, post_count)
     context = {
         'username': user,
         'page_obj': page_obj,
         'post_count': post_count,
+        'feed_cache_key': fragment_key(
+            request, author_feed(user.pk), page_obj
+        ),
     }
     return render(request, template, context)
 
 
+@query_budget(8)
+@condition_on_feeds(post_detail_validators)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
     author = post.author
-    post_count = Post.objects.filter(author=author).count()
+    post_count = author_post_count(author)
 
     context = {
         'post': post,
@@ -71,6 +96,75 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+@condition_on_feeds(index_validators)
+def latest_posts_feed(request):
+    """Лента последних постов сайта в RSS, Atom или JSON."""
+    return feed_response(
+        request, 'Последние обновления на сайте', reverse('posts:index'),
+        Post.objects.all(),
+    )
+
+
+@condition_on_feeds(group_validators)
+def group_posts_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug, hidden=False)
+    return feed_response(
+        request, f'Записи сообщества {group.title}',
+        reverse('posts:group_post', kwargs={'slug': slug}),
+        group.posts.all(),
+    )
+
+
+@condition_on_feeds(profile_validators)
+def profile_posts_feed(request, username):
+    user = get_object_or_404(User, username=username)
+    return feed_response(
+        request, f'Все записи пользователя {user.username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        user.posts.all(),
+    )
+
+
+@query_budget(4)
+def search(request):
+    """Поиск по тексту постов с сортировкой по релевантности."""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = search_posts(query, request.GET.get('cursor'), POSTS_COUNT)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@query_budget(2)
+def group_autocomplete(request):
+    """
+    Группы по части названия для поля группы в форме поста, по страницам:
+    {"results": [{"id": ..., "title": ...}], "next_page": 2 или null}.
+    Ищет по кэшу вариантов групп без запроса к базе; заодно не зависит
+    от LIKE в SQLite, который не сравнивает кириллицу без учета регистра.
+    """
+    query = request.GET.get('q', '').strip().casefold()
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    found = sorted(
+        (title, pk) for pk, title in group_choices()
+        if query in title.casefold()
+    )
+    start = (page - 1) * GROUPS_COUNT
+    return JsonResponse({
+        'results': [
+            {'id': pk, 'title': title}
+            for title, pk in found[start:start + GROUPS_COUNT]
+        ],
+        'next_page': page + 1 if len(found) > start + GROUPS_COUNT else None,
+    })
+
+
 # Проверяем, авторизован ли пользователь
 @login_required
 def post_edit(request, post_id):
@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+# Импорт регистрирует стандартный UserAdmin, который заменяем ниже.
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from posts.deletion import delete_author
+from posts.models import SENTINEL_USERNAME
+
+User = get_user_model()
+
+
+class UserAdmin(BaseUserAdmin):
+    """
+    Удаление пользователя переносит его посты на anonymous пачками.
+    Сам anonymous не удаляется.
+    """
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and obj.username == SENTINEL_USERNAME:
+            return False
+        return super().has_delete_permission(request, obj)
+
+    def get_deleted_objects(self, objs, request):
+        # Стандартная страница подтверждения загружает все посты автора.
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(User._meta.verbose_name)
+        return (
+            [user.get_username() for user in objs],
+            {User._meta.verbose_name_plural: len(objs)},
+            perms_needed,
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        delete_author(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset.exclude(username=SENTINEL_USERNAME):
+            delete_author(user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
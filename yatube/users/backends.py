@@ -0,0 +1,34 @@
+"""
+ModelBackend с кэшем пользователя.
+
+AuthenticationMiddleware на каждый запрос ищет пользователя сессии
+в auth_user. Здесь пользователь берется из кэша на USER_CACHE_TIMEOUT
+секунд; ключ — id пользователя, поэтому все сессии одного пользователя
+делят одну запись. Запись удаляется при сохранении и удалении
+пользователя (в том числе при смене пароля) и при выходе
+(users.signals).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = getattr(settings, 'USER_CACHE_TIMEOUT', 5 * 60)
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -26,22 +27,48 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.replica.ReplicaRoutingMiddleware',
+    'core.middleware.profiler.ProfilerMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Заголовок Server-Timing и строка лога core.middleware.timing (INFO)
+# с временем SQL, шаблонов и представления для каждого запроса.
+SERVER_TIMING = True
+
+# Метрики Prometheus на /metrics (доступны staff и по заголовку
+# Authorization: Bearer <YATUBE_METRICS_TOKEN>).
+# При нескольких воркерах нужен общий каталог YATUBE_METRICS_DIR.
+METRICS = True
+METRICS_DIR = os.environ.get('YATUBE_METRICS_DIR')
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+METRICS_NAMESPACES = ('posts', 'users', 'about')
+# Значения из памяти веб-процесса, отдаются на /metrics как gauge.
+METRICS_GAUGES = ('posts.cache.feed_cache_gauges',)
+
+# Профили запросов staff с ?_profile=1 или заголовком X-Profile: 1,
+# список на /debug/profiles/.
+PROFILE_DIR = os.environ.get(
+    'YATUBE_PROFILE_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube-profiles'),
+)
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATE = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Движок Django, засчитывающий время рендеринга в Server-Timing.
+        'BACKEND': 'core.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATE],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -62,13 +89,75 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # DatabaseS
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# YATUBE_SQLITE_PROFILE=production включает WAL и PRAGMA из
+# core.db.backends.sqlite3 и переиспользует соединения между запросами.
+SQLITE_PROFILE = os.environ.get('YATUBE_SQLITE_PROFILE', 'default')
+if SQLITE_PROFILE == 'production':
+    SQLITE_SETTINGS = {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'CONN_MAX_AGE': 600,
+    }
+else:
+    SQLITE_SETTINGS = {'ENGINE': 'django.db.backends.sqlite3'}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        **SQLITE_SETTINGS,
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# Реплики только для чтения: пути к файлам SQLite через запятую в
+# YATUBE_DB_REPLICAS. Копировать основную базу в реплики нужно снаружи
+# (например, litestream или cp по расписанию).
+REPLICA_DATABASES = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **SQLITE_SETTINGS,
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Представления, которые читают с реплик.
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_post',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+]
+
+# Сколько секунд после записи клиент читает с основной базы.
+REPLICA_STICKY_SECONDS = 10
+
+
+# Кэш процесса подходит для разработки; при нескольких воркерах нужен
+# общий бэкенд (memcached, redis), иначе инвалидация лент в одном
+# процессе не видна другим.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Время жизни отрендеренных фрагментов лент (posts.cache), сек.
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Сессии читаются из кэша и пишутся в кэш и БД: переживают перезапуск,
+# а на запрос с попаданием в кэш не тратят запрос к БД.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь сессии тоже кэшируется (users.backends), сек.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 5 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -109,5 +198,22 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 STATIC_URL = '/static/'
 
+# collectstatic собирает статику сюда с хэшами в именах и сжатыми
+# вариантами .gz/.br; отдает ее core.middleware.static.
+STATIC_ROOT = os.environ.get(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'static_collected')
+)
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# Фоновая очередь задач core.tasks в таблице core_task,
+# воркеры — manage.py run_workers. TASKS_EAGER выполняет задачи сразу.
+TASKS_EAGER = False
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 60 * 60
+
+# Превышение бюджета запросов (core.decorators.query_budget)
+# в режиме отладки и в тестах выбрасывает исключение, иначе пишется в лог.
+QUERY_BUDGET_RAISE = DEBUG
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
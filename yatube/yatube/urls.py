@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.views.generic import RedirectView
+
+from core.views import metrics
 
 
 urlpatterns = [
@@ -8,8 +9,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('favicon.ico', RedirectView.as_view(
-        url='/static/img/fav/favicon.ico')
-    ),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
+    path('debug/', include('core.urls', namespace='core')),
 ]